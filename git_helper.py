@@ -10,9 +10,14 @@ import requests
 from tqdm.auto import tqdm
 from git.remote import RemoteProgress
 
+# `glob` is not a package (and would clash with the stdlib `glob`), so the shared git helpers are imported by path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'glob'))
+import git_utils
+
 
 comfy_path = os.environ.get('COMFYUI_PATH')
 git_exe_path = os.environ.get('GIT_EXE_PATH')
+git_clone_strategy = os.environ.get('GIT_CLONE_STRATEGY', 'full')
 
 if comfy_path is None:
     print("\nWARN: The `COMFYUI_PATH` environment variable is not set. Assuming `custom_nodes/ComfyUI-Manager/../../` as the ComfyUI path.", file=sys.stderr)
@@ -71,10 +76,12 @@ def gitclone(custom_nodes_path, url, target_hash=None, repo_path=None):
         repo_path = os.path.join(custom_nodes_path, repo_name)
 
     # Clone the repository from the remote URL
-    repo = git.Repo.clone_from(url, repo_path, recursive=True, progress=GitProgress())
+    repo = git.Repo.clone_from(url, repo_path, recursive=True, progress=GitProgress(),
+                               multi_options=git_utils.clone_strategies.get(git_clone_strategy, []))
 
     if target_hash is not None:
         print(f"CHECKOUT: {repo_name} [{target_hash}]")
+        git_utils.fetch_commit(repo, target_hash)
         repo.git.checkout(target_hash)
             
     repo.git.clear_cache()
@@ -311,6 +318,7 @@ def checkout_custom_node_hash(git_custom_node_infos):
 
                     if commit_hash != item['hash']:
                         print(f"CHECKOUT: {repo_name} [{item['hash']}]")
+                        git_utils.fetch_commit(repo, item['hash'])
                         repo.git.checkout(item['hash'])
 
             except Exception:
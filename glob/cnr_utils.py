@@ -13,11 +13,153 @@ import toml
 
 base_url = "https://api.comfy.org"
 
+page_size = 30
+max_concurrent_fetches = 8
+fetch_interval = 0.1  # minimum interval (sec) between the starts of two page requests
+incremental_sync = True  # revalidate the pages of the previous catalog instead of downloading everything again
+
 
 lock = asyncio.Lock()
 
 is_cache_loading = False
 
+
+class RateLimiter:
+    """
+    Spaces out the starts of requests by `interval` seconds without blocking the event loop.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_time > now:
+                await asyncio.sleep(self.next_time - now)
+                now = self.next_time
+
+            self.next_time = now + self.interval
+
+
+def get_sync_checkpoint_path(uri):
+    return os.path.splitext(manager_util.get_cache_path(uri))[0] + '.sync'
+
+
+def remove_sync_checkpoint(uri):
+    try:
+        os.remove(get_sync_checkpoint_path(uri))
+    except FileNotFoundError:
+        pass
+
+
+class SyncCheckpoint:
+    """
+    Append-only record of the registry pages fetched so far.
+
+    The first line is a header describing the query, and each following line holds one finished page.
+    A checkpoint is only reused for the same query within the cache lifetime.
+    """
+    def __init__(self, path, query):
+        self.path = path
+        self.query = query
+        self.total_pages = None
+
+    def load(self):
+        """
+        :return: page -> nodes, page -> validators
+        """
+        pages = {}
+        validators = {}
+
+        if not manager_util.is_file_created_within_one_day(self.path):
+            return pages, validators
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get('query') != self.query:
+                    return pages, validators
+
+                self.total_pages = header['totalPages']
+
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn write of the last page
+
+                    pages[item['page']] = item['nodes']
+                    validators[item['page']] = item.get('validator', {})
+        except Exception:
+            self.total_pages = None
+            return {}, {}
+
+        return pages, validators
+
+    def add_page(self, page, total_pages, nodes, validator):
+        if self.total_pages != total_pages:
+            # the registry changed its shape (or this is a fresh sync) - start over
+            self.total_pages = total_pages
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'query': self.query, 'totalPages': total_pages}) + '\n')
+
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'page': page, 'nodes': nodes, 'validator': validator}) + '\n')
+
+
+def get_page_validators_path(uri):
+    return os.path.splitext(manager_util.get_cache_path(uri))[0] + '.pages'
+
+
+def load_previous_catalog(uri, query):
+    """
+    Load the previously synced catalog and the validators (ETag/Last-Modified and node ids) of its pages.
+
+    :return: node_id -> node, page -> validators, total pages
+    """
+    cache_path = manager_util.get_cache_path(uri)
+    validators_path = get_page_validators_path(uri)
+
+    if not incremental_sync or not os.path.exists(cache_path) or not os.path.exists(validators_path):
+        return {}, {}, None
+
+    try:
+        with open(validators_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+
+        if info.get('query') != query:
+            return {}, {}, None
+
+        nodes = manager_util.read_cache_file(cache_path)['nodes']
+
+        validators = {int(k): v for k, v in info['pages'].items()}
+        return {x['id']: x for x in nodes}, validators, info['totalPages']
+    except Exception:
+        return {}, {}, None
+
+
+def save_page_validators(uri, query, total_pages, validators):
+    info = {
+        'query': query,
+        'totalPages': total_pages,
+        'pages': {str(k): {'etag': v.get('etag'), 'last_modified': v.get('last_modified'), 'ids': v['ids']} for k, v in validators.items()},
+    }
+
+    try:
+        manager_util.atomic_write(get_page_validators_path(uri), json.dumps(info))
+    except Exception as e:
+        print(f"[ComfyUI-Manager] Failed to save the ComfyRegistry page validators: {e}")
+
+
+def get_sync_state():
+    """
+    (mtime, size) of the synced registry catalog, or None if it has never been synced
+    """
+    return manager_util.get_file_signature(manager_util.get_cache_path(f'{base_url}/nodes'))
+
+
 async def get_cnr_data(cache_mode=True, dont_wait=True):
     try:
         return await _get_cnr_data(cache_mode, dont_wait)
@@ -31,12 +173,6 @@ async def _get_cnr_data(cache_mode=True, dont_wait=True):
     uri = f'{base_url}/nodes'
 
     async def fetch_all():
-        remained = True
-        page = 1
-
-        full_nodes = {}
-
-        
         # Determine form factor based on environment and platform
         is_desktop = bool(os.environ.get('__COMFYUI_DESKTOP_VERSION__'))
         system = platform.system().lower()
@@ -67,20 +203,81 @@ async def _get_cnr_data(cache_mode=True, dont_wait=True):
                 form_factor = 'git-linux'
             else:
                 form_factor = 'other'
-        
-        while remained:
-            # Add comfyui_version and form_factor to the API request
-            sub_uri = f'{base_url}/nodes?page={page}&limit=30&comfyui_version={comfyui_ver}&form_factor={form_factor}'
-            sub_json_obj = await asyncio.wait_for(manager_util.get_data_with_cache(sub_uri, cache_mode=False, silent=True, dont_cache=True), timeout=30)
-            remained = page < sub_json_obj['totalPages']
 
-            for x in sub_json_obj['nodes']:
-                full_nodes[x['id']] = x
+        # Add comfyui_version and form_factor to the API request
+        query = f'limit={page_size}&comfyui_version={comfyui_ver}&form_factor={form_factor}'
+
+        checkpoint = SyncCheckpoint(get_sync_checkpoint_path(uri), query)
+        limiter = RateLimiter(fetch_interval)
+        semaphore = asyncio.Semaphore(max_concurrent_fetches)
+
+        # incremental refresh: revalidate each page of the previous catalog instead of downloading it again
+        prev_nodes, prev_validators, prev_total_pages = load_previous_catalog(uri, query)
+
+        async def fetch_page(page):
+            sub_uri = f'{base_url}/nodes?page={page}&{query}'
+            validator = prev_validators.get(page, {})
+
+            async with semaphore:
+                await limiter.wait()
+                status, sub_json_obj, page_validator = await asyncio.wait_for(
+                    manager_util.get_data_conditional(sub_uri, validator.get('etag'), validator.get('last_modified')), timeout=30)
+
+                if status == 304:
+                    nodes = [prev_nodes[x] for x in validator['ids'] if x in prev_nodes]
+                    total_pages = prev_total_pages
+
+                    if len(nodes) != len(validator['ids']):
+                        # the previous catalog doesn't match the validators anymore
+                        await limiter.wait()
+                        status, sub_json_obj, page_validator = await asyncio.wait_for(manager_util.get_data_conditional(sub_uri), timeout=30)
+
+                if status != 304:
+                    nodes = sub_json_obj['nodes']
+                    total_pages = sub_json_obj['totalPages']
+
+            page_validator['ids'] = [x['id'] for x in nodes]
+            page_validator['not_modified'] = status == 304
+            checkpoint.add_page(page, total_pages, nodes, page_validator)
+            return total_pages, nodes, page_validator
+
+        # the first page tells how many pages there are
+        pages, page_validators = checkpoint.load()
+        if 1 not in pages:
+            prev_total_pages_in_checkpoint = checkpoint.total_pages
+            total_pages, first_nodes, first_validator = await fetch_page(1)
+            if total_pages != prev_total_pages_in_checkpoint:
+                pages, page_validators = {}, {}
+            pages[1] = first_nodes
+            page_validators[1] = first_validator
+        else:
+            total_pages = checkpoint.total_pages
+
+        remained = [page for page in range(2, total_pages + 1) if page not in pages]
+        if len(pages) > 1:
+            print(f"[ComfyUI-Manager] Resuming ComfyRegistry sync: {len(pages)}/{total_pages} pages already fetched.")
+
+        results = await asyncio.gather(*[fetch_page(page) for page in remained], return_exceptions=True)
 
-            # 不在过程中显示进度信息，只在完成时显示一次
+        # NOTE: finished pages are already checkpointed, so a failed sync resumes from where it stopped
+        for page, result in zip(remained, results):
+            if isinstance(result, BaseException):
+                raise result
+            _, pages[page], page_validators[page] = result
 
-            page += 1
-            time.sleep(0.5)
+        not_modified = len([x for x in page_validators.values() if x.get('not_modified')])
+        if not_modified > 0:
+            print(f"[ComfyUI-Manager] ComfyRegistry: {not_modified}/{total_pages} pages are not modified since the last sync.")
+
+        save_page_validators(uri, query, total_pages, page_validators)
+
+        full_nodes = {}
+        for page in sorted(pages):
+            is_modified = not page_validators[page].get('not_modified')
+            for x in pages[page]:
+                # a node that moved to another page: prefer the freshly downloaded one
+                if is_modified or x['id'] not in full_nodes:
+                    full_nodes[x['id']] = x
 
         print("FETCH ComfyRegistry Data [DONE]")
 
@@ -99,17 +296,22 @@ async def _get_cnr_data(cache_mode=True, dont_wait=True):
                 return {}
             else:
                 print("[ComfyUI-Manager] The ComfyRegistry cache update is still in progress, so an outdated cache is being used.")
-                with open(manager_util.get_cache_path(uri), 'r', encoding="UTF-8", errors="ignore") as json_file:
-                    return json.load(json_file)['nodes']
+                return manager_util.load_document(('cnr', uri, 'cache'), manager_util.get_cache_path(uri))['nodes']
 
         if cache_state == 'cached':
-            with open(manager_util.get_cache_path(uri), 'r', encoding="UTF-8", errors="ignore") as json_file:
-                return json.load(json_file)['nodes']
+            return manager_util.load_document(('cnr', uri, 'cache'), manager_util.get_cache_path(uri))['nodes']
 
     try:
-        json_obj = await fetch_all()
-        manager_util.save_to_cache(uri, json_obj)
-        return json_obj['nodes']
+        cache_path = manager_util.get_cache_path(uri)
+        async with manager_util.cache_refresh_lock(cache_path) as refreshed:
+            if refreshed:
+                # another ComfyUI instance sharing the cache dir has just synced it
+                return manager_util.load_document(('cnr', uri, 'cache'), cache_path)['nodes']
+
+            json_obj = await fetch_all()
+            manager_util.save_to_cache(uri, json_obj)
+            remove_sync_checkpoint(uri)
+            return json_obj['nodes']
     except:
         res = {}
         print("Cannot connect to comfyregistry.")
@@ -212,7 +414,7 @@ def read_cnr_info(fullpath):
 
             # normalize version
             # for example: 2.5 -> 2.5.0
-            version = str(manager_util.StrictVersion(project.get('version')))
+            version = str(manager_util.get_strict_version(project.get('version')))
 
             urls = project.get('urls', {})
             repository = urls.get('Repository')
@@ -1,5 +1,7 @@
 import os
-import configparser
+import stat
+
+import git
 
 
 GITHUB_ENDPOINT = os.getenv('GITHUB_ENDPOINT')
@@ -12,43 +14,194 @@ def is_git_repo(path: str) -> bool:
     return os.path.exists(os.path.join(path, '.git'))
 
 
-def get_commit_hash(fullpath):
-    git_head = os.path.join(fullpath, '.git', 'HEAD')
-    if os.path.exists(git_head):
-        with open(git_head) as f:
-            line = f.readline()
-
-            if line.startswith("ref: "):
-                ref = os.path.join(fullpath, '.git', line[5:].strip())
-                if os.path.exists(ref):
-                    with open(ref) as f2:
-                        return f2.readline().strip()
-                else:
-                    return "unknown"
+#
+# Pure-file reader of git metadata
+#
+# Scanning hundreds of node packs must not spawn `git` or GitPython, so HEAD, refs, packed-refs and config are
+# read directly. Parsed results are memoized per file and reused while the file's stat signature is unchanged.
+#
+git_file_memo = {}  # (path, parser) -> (signature, value)
+
+
+def read_git_file(path, parser):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    # git replaces refs and config through a lock file, so the inode changes even when mtime/size don't
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    key = path, parser
+
+    cached = git_file_memo.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            value = parser(f.read())
+    except OSError:
+        return None
+
+    git_file_memo[key] = signature, value
+    return value
+
+
+def parse_first_line(text):
+    lines = text.splitlines()
+    return lines[0].strip() if lines else ''
+
+
+def parse_packed_refs(text):
+    refs = {}
+    for line in text.splitlines():
+        if not line or line[0] in '#^':  # header or peeled tag
+            continue
+
+        sha, _, ref = line.partition(' ')
+        refs[ref.strip()] = sha
+
+    return refs
+
+
+def parse_remote_urls(text):
+    """
+    Minimal `.git/config` parser that only extracts `remote.<name>.url`, in order of appearance.
+    """
+    urls = []
+    remote = None
+    seen = set()
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+
+        if line.startswith('['):
+            section = line[1:line.find(']')].strip()
+            name, _, subsection = section.partition(' ')
+            if name.lower() == 'remote' and subsection:
+                remote = subsection.strip().strip('"')
+            elif name.lower().startswith('remote.'):  # deprecated [remote.origin] syntax
+                remote = section[7:]
             else:
-                return line
+                remote = None
+            continue
 
-    return "unknown"
+        if remote is None or remote in seen:
+            continue
 
+        key, sep, value = line.partition('=')
+        if not sep or key.strip().lower() != 'url':
+            continue
 
-def git_url(fullpath):
+        value = value.strip()
+        if value.startswith('"'):
+            value = value[1:value.find('"', 1)] if '"' in value[1:] else value[1:]
+        else:
+            for c in '#;':
+                if c in value:
+                    value = value[:value.find(c)].rstrip()
+
+        urls.append((remote, value))
+        seen.add(remote)
+
+    return urls
+
+
+def get_git_dirs(fullpath):
     """
-    resolve version of unclassified custom node based on remote url in .git/config
+    Locate the git directory of a working tree.
+
+    :return: (gitdir, commondir) or None. For submodules and worktrees, `.git` is a file pointing (`gitdir: ...`) to
+             the real git directory, and a worktree's shared refs/config live in its `commondir`.
     """
-    git_config_path = os.path.join(fullpath, '.git', 'config')
+    dot_git = os.path.join(fullpath, '.git')
 
-    if not os.path.exists(git_config_path):
+    try:
+        st = os.stat(dot_git)
+    except OSError:
         return None
 
-    # Set `strict=False` to allow duplicate `vscode-merge-base` sections, addressing <https://github.com/ltdrdata/ComfyUI-Manager/issues/1529>
-    config = configparser.ConfigParser(strict=False)
-    config.read(git_config_path)
+    if stat.S_ISDIR(st.st_mode):
+        gitdir = dot_git
+    else:
+        line = read_git_file(dot_git, parse_first_line)
+        if not line or not line.startswith('gitdir:'):
+            return None
 
-    for k, v in config.items():
-        if k.startswith('remote ') and 'url' in v:
-            if 'Comfy-Org/ComfyUI-Manager' in v['url']:
-                return "https://github.com/ltdrdata/ComfyUI-Manager"
-            return v['url']
+        gitdir = os.path.normpath(os.path.join(fullpath, line[7:].strip()))
+
+    commondir = read_git_file(os.path.join(gitdir, 'commondir'), parse_first_line)
+    if commondir:
+        commondir = os.path.normpath(os.path.join(gitdir, commondir))
+    else:
+        commondir = gitdir
+
+    return gitdir, commondir
+
+
+def resolve_git_ref(gitdir, commondir, ref):
+    """
+    Resolve a ref such as `refs/heads/main` into a commit hash. Returns None if it cannot be resolved.
+    """
+    for _ in range(5):  # limit the depth of symbolic refs
+        value = None
+        for base in (gitdir, commondir) if gitdir != commondir else (gitdir, ):
+            value = read_git_file(os.path.join(base, *ref.split('/')), parse_first_line)
+            if value:
+                break
+
+        if not value:
+            packed_refs = read_git_file(os.path.join(commondir, 'packed-refs'), parse_packed_refs)
+            return packed_refs.get(ref) if packed_refs else None
+
+        if not value.startswith('ref:'):
+            return value
+
+        ref = value[4:].strip()
+
+    return None
+
+
+def get_commit_hash(fullpath):
+    git_dirs = get_git_dirs(fullpath)
+    if git_dirs is None:
+        return "unknown"
+
+    gitdir, commondir = git_dirs
+    head = read_git_file(os.path.join(gitdir, 'HEAD'), parse_first_line)
+    if not head:
+        return "unknown"
+
+    if head.startswith('ref:'):
+        return resolve_git_ref(gitdir, commondir, head[4:].strip()) or "unknown"
+
+    return head  # detached HEAD
+
+
+def get_remote_urls(fullpath):
+    """
+    :return: list of (remote name, url) from the git config, or None if there is no git config
+    """
+    git_dirs = get_git_dirs(fullpath)
+    if git_dirs is None:
+        return None
+
+    return read_git_file(os.path.join(git_dirs[1], 'config'), parse_remote_urls)
+
+
+def git_url(fullpath):
+    """
+    resolve version of unclassified custom node based on remote url in .git/config
+    """
+    for _, url in get_remote_urls(fullpath) or []:
+        if 'Comfy-Org/ComfyUI-Manager' in url:
+            return "https://github.com/ltdrdata/ComfyUI-Manager"
+        return url
 
     return None
 
@@ -84,4 +237,45 @@ def get_url_for_clone(url):
         url = GITHUB_ENDPOINT + url[18:] # url[18:] -> remove `https://github.com`
 
     return url
-    
\ No newline at end of file
+
+
+# options of `git clone` for each `git_clone_strategy`
+# shallow and partial clones skip the history or the blobs/trees of old commits, which are fetched on demand
+clone_strategies = {
+    'full': [],
+    'shallow': ['--depth=1', '--shallow-submodules'],
+    'blobless': ['--filter=blob:none'],
+    'treeless': ['--filter=tree:0'],
+}
+
+
+def fetch_commit(repo, commit):
+    """
+    make `commit` available before checking it out.
+    Shallow and partial clones may not have it. The exact commit is fetched first,
+    and if the remote doesn't serve it by its hash, the history is deepened (or fetched) instead.
+    """
+    try:
+        repo.git.rev_parse('--verify', '--quiet', f'{commit}^{{commit}}')
+        return
+    except git.GitCommandError:
+        pass
+
+    remote_names = [x.name for x in repo.remotes]
+    if not remote_names:
+        return
+
+    remote_name = next((x for x in ('origin', 'upstream') if x in remote_names), remote_names[0])
+    is_shallow = repo.git.rev_parse('--is-shallow-repository') == 'true'
+
+    try:
+        if is_shallow:
+            repo.git.fetch(remote_name, commit, '--depth=1')
+        else:
+            repo.git.fetch(remote_name, commit)
+    except git.GitCommandError:
+        print(f"[ComfyUI-Manager] The commit '{commit}' cannot be fetched directly. Fetching the history of '{repo.working_dir}'.")
+        if is_shallow:
+            repo.git.fetch(remote_name, '--unshallow')
+        else:
+            repo.git.fetch(remote_name)
@@ -12,6 +12,10 @@ import re
 import shutil
 import configparser
 import platform
+import threading
+import dataclasses
+import asyncio
+import signal
 from datetime import datetime
 
 import git
@@ -22,7 +26,7 @@ import time
 import yaml
 import zipfile
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import toml
 
 orig_print = print
@@ -40,7 +44,7 @@ import cnr_utils
 import manager_util
 import git_utils
 import manager_downloader
-from node_package import InstalledNodePackage
+from node_package import InstalledNodePackage, InstalledPacksSnapshot, NodePackEntry, get_fingerprint
 
 
 version_code = [3, 32, 8]
@@ -111,6 +115,9 @@ def get_script_env():
     if git_exe is not None:
         new_env['GIT_EXE_PATH'] = git_exe
 
+    if 'GIT_CLONE_STRATEGY' not in new_env:
+        new_env['GIT_CLONE_STRATEGY'] = get_config()['git_clone_strategy']
+
     if 'COMFYUI_PATH' not in new_env:
         new_env['COMFYUI_PATH'] = comfy_path
 
@@ -135,37 +142,13 @@ def extract_base_custom_nodes_dir(x:str):
 def check_invalid_nodes():
     global invalid_nodes
 
-    try:
-        import folder_paths
-    except:
-        try:
-            sys.path.append(comfy_path)
-            import folder_paths
-        except:
-            raise Exception(f"Invalid COMFYUI_FOLDERS_BASE_PATH: {comfy_path}")
-
-    def check(root):
-        global invalid_nodes
-
-        subdirs = [d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))]
-        for subdir in subdirs:
-            if subdir in ['.disabled', '__pycache__']:
-                continue
-
-            package = unified_manager.installed_node_packages.get(subdir)
-            if not package:
-                continue
-
-            if not package.isValid():
-                invalid_nodes[subdir] = package.fullpath
-
-    node_paths = folder_paths.get_folder_paths("custom_nodes")
-    for x in node_paths:
-        check(x)
+    for x in scan_installed_packs().dirs:
+        package = unified_manager.installed_node_packages.get(x.name)
+        if not package:
+            continue
 
-        disabled_dir = os.path.join(x, '.disabled')
-        if os.path.exists(disabled_dir):
-            check(disabled_dir)
+        if not package.isValid():
+            invalid_nodes[x.name] = package.fullpath
 
     if len(invalid_nodes):
         print("\n-------------------- ComfyUI-Manager invalid nodes notice ----------------")
@@ -289,7 +272,7 @@ def is_blacklisted(name):
                 return True
         elif match.group(2) in ['<=', '==', '<', '~=']:
             if name in pips:
-                if manager_util.StrictVersion(pips[name]) >= manager_util.StrictVersion(match.group(3)):
+                if manager_util.get_strict_version(pips[name]) >= manager_util.get_strict_version(match.group(3)):
                     return True
 
     return False
@@ -318,7 +301,7 @@ def is_installed(name):
                 return True
         elif match.group(2) in ['<=', '==', '<', '~=']:
             if name in pips:
-                if manager_util.StrictVersion(pips[name]) >= manager_util.StrictVersion(match.group(3)):
+                if manager_util.get_strict_version(pips[name]) >= manager_util.get_strict_version(match.group(3)):
                     print(f"[ComfyUI-Manager] skip black listed pip installation: '{name}'")
                     return True
 
@@ -330,17 +313,17 @@ def is_installed(name):
         return True   # don't update if version is not specified
 
     if match.group(2) in ['>', '>=']:
-        if manager_util.StrictVersion(pkg) < manager_util.StrictVersion(match.group(3)):
+        if manager_util.get_strict_version(pkg) < manager_util.get_strict_version(match.group(3)):
             return False
-        elif manager_util.StrictVersion(pkg) > manager_util.StrictVersion(match.group(3)):
+        elif manager_util.get_strict_version(pkg) > manager_util.get_strict_version(match.group(3)):
             print(f"[SKIP] Downgrading pip package isn't allowed: {name.lower()} (cur={pkg})")
 
     if match.group(2) == '==':
-        if manager_util.StrictVersion(pkg) < manager_util.StrictVersion(match.group(3)):
+        if manager_util.get_strict_version(pkg) < manager_util.get_strict_version(match.group(3)):
             return False
 
     if match.group(2) == '~=':
-        if manager_util.StrictVersion(pkg) == manager_util.StrictVersion(match.group(3)):
+        if manager_util.get_strict_version(pkg) == manager_util.get_strict_version(match.group(3)):
             return False
 
     return name.lower() in manager_util.get_installed_packages()
@@ -400,6 +383,98 @@ class ManagedResult:
         return self
 
 
+pack_resolution_workers = 16
+
+
+def map_node_packs(func, paths):
+    """
+    `map(func, paths)` over a bounded thread pool, preserving the order of `paths`.
+    Probing a node pack is dominated by small file reads, which are slow on network filesystems and slow disks.
+    """
+    paths = list(paths)
+    if len(paths) < 2:
+        return [func(x) for x in paths]
+
+    with ThreadPoolExecutor(max_workers=min(pack_resolution_workers, len(paths))) as executor:
+        return list(executor.map(func, paths))
+
+
+#
+# Pack scanner
+#
+# `custom_nodes` and `custom_nodes/.disabled` are walked in one place, and the result is shared by
+# `UnifiedManager.reload`, `get_installed_node_packs`, `get_current_snapshot` and `check_invalid_nodes`.
+#
+installed_packs_snapshot = None
+installed_packs_snapshot_lock = threading.Lock()
+scan_reuse_seconds = 1.0
+
+
+def get_scan_roots():
+    res = []
+    for x in get_custom_nodes_paths():
+        for path in (x, os.path.join(x, '.disabled')):
+            try:
+                res.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                res.append((path, None))
+
+    return tuple(res)
+
+
+def scan_installed_packs(force=False) -> InstalledPacksSnapshot:
+    """
+    Return the snapshot of the installed node packs.
+
+    The previous snapshot is reused while the custom node directories are unchanged, for up to `scan_reuse_seconds`.
+    (Changes inside a pack, such as `git pull`, don't touch the parent directory.)
+    """
+    global installed_packs_snapshot
+
+    roots = get_scan_roots()
+    prev = installed_packs_snapshot
+
+    if not force and prev is not None and prev.roots == roots and time.time() - prev.timestamp < scan_reuse_seconds:
+        return prev
+
+    items = []
+    for custom_nodes_path in get_custom_nodes_paths():
+        for in_disabled_dir, path in ((False, custom_nodes_path), (True, os.path.join(custom_nodes_path, '.disabled'))):
+            if in_disabled_dir and not os.path.isdir(path):
+                continue
+
+            with os.scandir(path) as it:
+                for x in it:
+                    if x.name not in ['__pycache__', '.disabled']:
+                        items.append((x.name, x.path, x.is_dir(), in_disabled_dir))
+
+    fingerprints = map_node_packs(lambda x: get_fingerprint(x[1]) if x[2] else None, items)
+    entries = tuple(NodePackEntry(*item, fingerprint=fingerprint) for item, fingerprint in zip(items, fingerprints))
+
+    with installed_packs_snapshot_lock:
+        prev = installed_packs_snapshot
+        if prev is None:
+            generation = 1
+        elif prev.entries == entries:
+            generation = prev.generation
+        else:
+            generation = prev.generation + 1
+
+        installed_packs_snapshot = InstalledPacksSnapshot(generation=generation, timestamp=time.time(), roots=roots, entries=entries)
+        return installed_packs_snapshot
+
+
+def invalidate_installed_packs():
+    """
+    Must be called after modifying node packs in place (e.g. update), so that the next scan doesn't reuse the snapshot.
+    """
+    global installed_packs_snapshot
+
+    with installed_packs_snapshot_lock:
+        if installed_packs_snapshot is not None:
+            installed_packs_snapshot = dataclasses.replace(installed_packs_snapshot, timestamp=0)
+
+
 class UnifiedManager:
     def __init__(self):
         self.installed_node_packages: dict[str, InstalledNodePackage] = {}
@@ -411,20 +486,44 @@ class UnifiedManager:
         self.unknown_active_nodes = {}     # node_id -> repo url * fullpath
         self.cnr_map = {}                  # node_id -> cnr info
         self.repo_cnr_map = {}             # repo_url -> cnr info
-        self.custom_node_map_cache = {}    # (channel, mode) -> augmented custom node list json
+        self.custom_node_map_cache = {}    # (channel, mode) -> augmented custom node list json (shared, must not be modified)
+        self.path_cache = {}               # fullpath -> fingerprint * cnr generation * InstalledNodePackage * repo url
+        self.loaded_cnrs = None
+        self.cnr_generation = 0            # increased whenever 'cnr_map' and 'repo_cnr_map' are rebuilt
+        self.cnr_sync_state = None         # `cnr_utils.get_sync_state()` of the registry catalog the maps are built from, if known
         self.processed_install = set()
 
+        # secondary indexes, kept in sync with the maps above
+        self.unknown_active_url_map = {}   # repo url -> node_id (of unknown_active_nodes)
+        self.cnr_inactive_versions = {}    # node_id -> sorted list of parsed version * node_version (of cnr_inactive_nodes)
+
     def get_module_name(self, x):
         info = self.active_nodes.get(x)
         if info is None:
-            for url, fullpath in self.unknown_active_nodes.values():
-                if url == x:
-                    return os.path.basename(fullpath)
+            node_id = self.unknown_active_url_map.get(x)
+            if node_id is not None:
+                return os.path.basename(self.unknown_active_nodes[node_id][1])
         else:
             return os.path.basename(info[1])
 
         return None
 
+    def set_unknown_active_node(self, node_id, url, fullpath):
+        self.remove_unknown_active_node(node_id)
+        self.unknown_active_nodes[node_id] = url, fullpath
+        self.unknown_active_url_map.setdefault(url, node_id)
+
+    def remove_unknown_active_node(self, node_id):
+        repo_and_path = self.unknown_active_nodes.pop(node_id, None)
+        if repo_and_path is not None and self.unknown_active_url_map.get(repo_and_path[0]) == node_id:
+            del self.unknown_active_url_map[repo_and_path[0]]
+
+            # another pack may share the url
+            for k, v in self.unknown_active_nodes.items():
+                if v[0] == repo_and_path[0]:
+                    self.unknown_active_url_map[v[0]] = k
+                    break
+
     def get_cnr_by_repo(self, url):
         return self.repo_cnr_map.get(git_utils.normalize_url(url))
 
@@ -550,21 +649,56 @@ class UnifiedManager:
                 if cnr:
                     # normalize version
                     # for example: 2.5 -> 2.5.0
-                    ver = str(manager_util.StrictVersion(info['version']))
+                    ver = str(manager_util.get_strict_version(info['version']))
                     return {'id': cnr['id'], 'cnr': cnr, 'ver': ver}
                 else:
                     return None
             else:
                 return None
 
+    def resolve_package_at_path(self, fullpath, fingerprint=None):
+        """
+        resolve the node package at `fullpath`, reusing the previous result if its fingerprint is unchanged
+
+        :return: InstalledNodePackage, normalized repo url (only for unknown packages)
+        """
+        if fingerprint is None:
+            fingerprint = get_fingerprint(fullpath)
+        cnr_generation = self.cnr_generation
+
+        cached = self.path_cache.get(fullpath)
+        if cached is not None and cached[0] == fingerprint and cached[1] == cnr_generation:
+            return cached[2], cached[3]
+
+        # persisted by the previous run: the generation is per process, so the synced catalog it was resolved with is compared
+        cnr_sync_state = list(self.cnr_sync_state) if self.cnr_sync_state is not None else None
+        indexed = get_installed_pack_index_entry(fullpath, fingerprint, 'package')
+        if indexed is not None and cnr_sync_state is not None and indexed['cnr_sync_state'] == cnr_sync_state:
+            node_package = InstalledNodePackage(id=indexed['id'], fullpath=fullpath, disabled=indexed['disabled'], version=indexed['version'])
+            url = indexed['url']
+        else:
+            node_package = InstalledNodePackage.from_fullpath(fullpath, self.resolve_from_path)
+
+            url = None
+            if node_package.is_unknown:
+                url = git_utils.git_url(node_package.fullpath)
+                if url is not None:
+                    url = git_utils.normalize_url(url)
+
+            set_installed_pack_index_entry(fullpath, fingerprint, 'package',
+                                           {'id': node_package.id, 'disabled': node_package.disabled, 'version': node_package.version,
+                                            'url': url, 'cnr_sync_state': cnr_sync_state})
+
+        self.path_cache[fullpath] = fingerprint, cnr_generation, node_package, url
+        return node_package, url
+
     def update_cache_at_path(self, fullpath):
-        node_package = InstalledNodePackage.from_fullpath(fullpath, self.resolve_from_path)
+        self.register_node_package(*self.resolve_package_at_path(fullpath))
+
+    def register_node_package(self, node_package, url):
         self.installed_node_packages[node_package.id] = node_package
 
         if node_package.is_disabled and node_package.is_unknown:
-            url = git_utils.git_url(node_package.fullpath)
-            if url is not None:
-                url = git_utils.normalize_url(url)
             self.unknown_inactive_nodes[node_package.id] = (url, node_package.fullpath)
 
         if node_package.is_disabled and node_package.is_nightly:
@@ -574,10 +708,7 @@ class UnifiedManager:
             self.active_nodes[node_package.id] = node_package.version, node_package.fullpath
 
         if node_package.is_enabled and node_package.is_unknown:
-            url = git_utils.git_url(node_package.fullpath)
-            if url is not None:
-                url = git_utils.normalize_url(url)
-            self.unknown_active_nodes[node_package.id] = (url, node_package.fullpath)
+            self.set_unknown_active_node(node_package.id, url, node_package.fullpath)
 
         if node_package.is_from_cnr and node_package.is_disabled:
             self.add_to_cnr_inactive_nodes(node_package.id, node_package.version, node_package.fullpath)
@@ -591,44 +722,6 @@ class UnifiedManager:
 
         return False
 
-    def fetch_or_pull_git_repo(self, is_pull=False):
-        updated = set()
-        failed = set()
-
-        def check_update(node_name, fullpath, ver_spec):
-            try:
-                if is_pull:
-                    is_updated, success = git_repo_update_check_with(fullpath, do_update=True)
-                else:
-                    is_updated, success = git_repo_update_check_with(fullpath, do_fetch=True)
-
-                return f"{node_name}@{ver_spec}", is_updated, success
-            except Exception:
-                traceback.print_exc()
-
-            return f"{node_name}@{ver_spec}", False, False
-
-        with ThreadPoolExecutor() as executor:
-            futures = []
-
-            for k, v in self.unknown_active_nodes.items():
-                futures.append(executor.submit(check_update, k, v[1], 'unknown'))
-
-            for k, v in self.active_nodes.items():
-                if v[0] == 'nightly':
-                    futures.append(executor.submit(check_update, k, v[1], 'nightly'))
-
-            for future in as_completed(futures):
-                item, is_updated, success = future.result()
-
-                if is_updated:
-                    updated.add(item)
-
-                if not success:
-                    failed.add(item)
-
-        return dict(updated=list(updated), failed=list(failed))
-
     def is_enabled(self, node_id, version_spec=None):
         """
         1. true if node_id@<specified_version> is enabled
@@ -700,8 +793,39 @@ class UnifiedManager:
             ver_map = {}
             self.cnr_inactive_nodes[node_id] = ver_map
 
+        if ver in ver_map:
+            self.remove_from_cnr_inactive_nodes(node_id, ver)
+
         ver_map[ver] = fullpath
 
+        # keep versions sorted; among equal versions, the first added one stays last (= the latest)
+        versions = self.cnr_inactive_versions.setdefault(node_id, [])
+        parsed = self.safe_version(ver)
+        i = 0
+        while i < len(versions) and versions[i][0] < parsed:
+            i += 1
+        versions.insert(i, (parsed, ver))
+
+    def remove_from_cnr_inactive_nodes(self, node_id, ver=None):
+        """
+        remove `ver` of `node_id` from the cnr inactive nodes, or all versions if `ver` is None
+        """
+        if ver is None:
+            self.cnr_inactive_nodes.pop(node_id, None)
+            self.cnr_inactive_versions.pop(node_id, None)
+            return
+
+        ver_map = self.cnr_inactive_nodes.get(node_id)
+        if ver_map is None or ver not in ver_map:
+            return
+
+        del ver_map[ver]
+        versions = [x for x in self.cnr_inactive_versions.get(node_id, []) if x[1] != ver]
+        if versions:
+            self.cnr_inactive_versions[node_id] = versions
+        else:
+            self.cnr_inactive_versions.pop(node_id, None)
+
     def get_from_cnr_active_nodes(self, node_id):
         ver_path = self.active_nodes.get(node_id)
         if ver_path is None:
@@ -717,17 +841,12 @@ class UnifiedManager:
         if ver is not None:
             return ver_map.get(ver)
 
-        latest = None
-        for k, v in ver_map.items():
-            if latest is None:
-                latest = self.safe_version(k), v
-                continue
-
-            cur_ver = self.safe_version(k)
-            if cur_ver > latest[0]:
-                latest = cur_ver, v
+        versions = self.cnr_inactive_versions.get(node_id)
+        if not versions:
+            return None
 
-        return latest
+        parsed, ver = versions[-1]
+        return parsed, ver_map[ver]
 
     async def reload(self, cache_mode, dont_wait=True):
         self.custom_node_map_cache = {}
@@ -736,35 +855,44 @@ class UnifiedManager:
         self.unknown_inactive_nodes = {}  # node_id -> repo url * fullpath
         self.unknown_active_nodes = {}    # node_id -> repo url * fullpath
         self.active_nodes = {}            # node_id -> node_version * fullpath
+        self.unknown_active_url_map = {}
+        self.cnr_inactive_versions = {}
 
         if get_config()['network_mode'] != 'public':
             dont_wait = True
 
         # reload 'cnr_map' and 'repo_cnr_map'
+        cnr_sync_state = cnr_utils.get_sync_state()
         cnrs = await cnr_utils.get_cnr_data(cache_mode=cache_mode=='cache', dont_wait=dont_wait)
+        if cnr_utils.get_sync_state() != cnr_sync_state:
+            cnr_sync_state = None  # synced while loading: it is unknown which catalog has been loaded
+
+        # unchanged registry data is shared by the document cache, and no data (not cached yet, or a failed fetch) adds nothing to the maps,
+        # so neither rebuilds them: a rebuild invalidates every resolved pack (see `resolve_package_at_path`)
+        if cnrs and cnrs is not self.loaded_cnrs:
+            for x in cnrs:
+                self.cnr_map[x['id']] = x
+                if 'repository' in x:
+                    normalized_url = git_utils.normalize_url(x['repository'])
+                    self.repo_cnr_map[normalized_url] = x
+
+            self.loaded_cnrs = cnrs
+            self.cnr_generation += 1
+            self.cnr_sync_state = cnr_sync_state
+
+        # reload node status info from custom_nodes/* and custom_nodes/.disabled/*
+        # NOTE: Only the packs whose fingerprint has changed are resolved again. (see `resolve_package_at_path`)
+        entries = scan_installed_packs().get_reload_order()
 
-        for x in cnrs:
-            self.cnr_map[x['id']] = x
-            if 'repository' in x:
-                normalized_url = git_utils.normalize_url(x['repository'])
-                self.repo_cnr_map[normalized_url] = x
-
-        # reload node status info from custom_nodes/*
-        for custom_nodes_path in folder_paths.get_folder_paths('custom_nodes'):
-            for x in os.listdir(custom_nodes_path):
-                fullpath = os.path.join(custom_nodes_path, x)
-                if os.path.isdir(fullpath):
-                    if x not in ['__pycache__', '.disabled']:
-                        self.update_cache_at_path(fullpath)
-
-        # reload node status info from custom_nodes/.disabled/*
-        for custom_nodes_path in folder_paths.get_folder_paths('custom_nodes'):
-            disabled_dir = os.path.join(custom_nodes_path, '.disabled')
-            if os.path.exists(disabled_dir):
-                for x in os.listdir(disabled_dir):
-                    fullpath = os.path.join(disabled_dir, x)
-                    if os.path.isdir(fullpath):
-                        self.update_cache_at_path(fullpath)
+        # resolve in parallel, but register in the scan order, so that the result is deterministic
+        for node_package, url in map_node_packs(lambda x: self.resolve_package_at_path(x.fullpath, x.fingerprint), entries):
+            self.register_node_package(node_package, url)
+
+        visited = set(x.fullpath for x in entries)
+        for x in set(self.path_cache.keys()) - visited:
+            del self.path_cache[x]
+
+        save_installed_pack_index()
 
     @staticmethod
     async def load_nightly(channel, mode):
@@ -786,6 +914,7 @@ class UnifiedManager:
 
         json_obj = await get_data_by_mode(mode, 'custom-node-list.json', channel_url=channel_url)
         for x in json_obj['custom_nodes']:
+            x = dict(x)  # items are modified by `get_custom_nodes`
             try:
                 for y in x['files']:
                     if 'github.com' in y and not (y.endswith('.py') or y.endswith('.js')):
@@ -801,6 +930,10 @@ class UnifiedManager:
         return res
 
     async def get_custom_nodes(self, channel, mode):
+        """
+        Returns the catalog shared by all callers. Its items must not be modified; copy an item before adding state to it.
+        (see `get_unified_total_nodes`)
+        """
         if channel is None and mode is None:
             channel = 'default'
             mode = 'cache'
@@ -846,10 +979,7 @@ class UnifiedManager:
 
     @staticmethod
     def safe_version(ver_str):
-        try:
-            return version.parse(ver_str)
-        except:
-            return version.parse("0.0.0")
+        return manager_util.get_pep440_version(ver_str)
 
     def execute_install_script(self, url, repo_path, instant_execution=False, lazy_mode=False, no_deps=False):
         install_script_path = os.path.join(repo_path, "install.py")
@@ -883,6 +1013,86 @@ class UnifiedManager:
 
         return res
 
+    def execute_install_scripts(self, targets, instant_execution=False, no_deps=False, on_done=None):
+        """
+        batched `execute_install_script` for many node packs
+
+        The requirements of all `targets` are installed by a single deduplicated pip install instead of one pip
+        call per line, and then the install scripts run. If the batched install fails, the packages are installed
+        one by one as `execute_install_script` does, so that a broken requirement only fails its own node packs.
+
+        :param targets: list of (url, repo_path)
+        :param on_done: called with (index, success) as soon as each target is finished
+        :return: list of success for each target
+        """
+        success = [True] * len(targets)
+
+        if not no_deps:
+            packages = {}       # package -> indexes of the targets which require it
+            singles = []        # (index, package) - lines with options or local paths are installed one by one
+            processed = set(self.processed_install)
+
+            for i, (url, repo_path) in enumerate(targets):
+                requirements_path = os.path.join(repo_path, "requirements.txt")
+                if not os.path.exists(requirements_path):
+                    continue
+
+                for line in manager_util.robust_readlines(requirements_path):
+                    package_name = remap_pip_package(line.strip())
+                    if not package_name or package_name.startswith('#') or package_name in processed:
+                        continue
+
+                    clean_package_name = package_name.split('#')[0].strip()
+                    if clean_package_name == "":
+                        continue
+
+                    self.processed_install.add(package_name)
+
+                    if clean_package_name.startswith(('-', '.')) or ' ' in clean_package_name:
+                        if (i, clean_package_name) not in singles:
+                            singles.append((i, clean_package_name))
+                    elif is_blacklisted(clean_package_name):
+                        print(f"[ComfyUI-Manager] skip black listed pip installation: '{clean_package_name}'")
+                    elif i not in packages.setdefault(clean_package_name, []):
+                        packages[clean_package_name].append(i)
+
+            if packages or singles:
+                print(f"Install: pip packages ({len(packages) + len(singles)} requirements of {len(targets)} node packs)")
+                pip_fixer = manager_util.PIPFixer(manager_util.get_installed_packages(), comfy_path, manager_files_path)
+
+                if packages and is_lazy_install(instant_execution):
+                    # reserved scripts are checked line by line at the startup, so they are not batched
+                    singles = [(indexes[0], x) for x, indexes in packages.items()] + singles
+                elif packages:
+                    install_cmd = manager_util.make_pip_cmd(["install"] + list(packages.keys()))
+                    if not try_install_script("batched requirements", comfy_path, install_cmd, instant_execution=instant_execution):
+                        print("[ComfyUI-Manager] The batched pip installation failed. Retrying the packages one by one.")
+                        singles = [(indexes[0], x) for x, indexes in packages.items()] + singles
+                    else:
+                        packages = {}
+
+                for i, package_name in singles:
+                    url, repo_path = targets[i]
+                    install_cmd = manager_util.make_pip_cmd(["install", package_name])
+                    if not try_install_script(url, repo_path, install_cmd, instant_execution=instant_execution):
+                        for x in packages.get(package_name, [i]):
+                            success[x] = False
+
+                pip_fixer.fix_broken()
+
+        for i, (url, repo_path) in enumerate(targets):
+            install_script_path = os.path.join(repo_path, "install.py")
+            if os.path.exists(install_script_path) and install_script_path not in self.processed_install:
+                self.processed_install.add(install_script_path)
+                print(f"Install: install script ({url})")
+                install_cmd = [sys.executable, "install.py"]
+                success[i] = try_install_script(url, repo_path, install_cmd, instant_execution=instant_execution) and success[i]
+
+            if on_done is not None:
+                on_done(i, success[i])
+
+        return success
+
     def reserve_cnr_switch(self, target, zip_url, from_path, to_path, no_deps):
         script_path = os.path.join(manager_startup_script_path, "install-scripts.txt")
         with open(script_path, "a") as file:
@@ -1009,6 +1219,7 @@ class UnifiedManager:
 
         # 6. post install
         result.target = version_spec
+        result.to_path = install_path
 
         def postinstall():
             res = self.execute_install_script(f"{node_id}@{version_spec}", install_path, instant_execution=instant_execution, no_deps=no_deps)
@@ -1091,13 +1302,13 @@ class UnifiedManager:
 
         # update cache
         if version_spec == 'unknown':
-            self.unknown_active_nodes[node_id] = self.unknown_inactive_nodes[node_id][0], to_path
+            self.set_unknown_active_node(node_id, self.unknown_inactive_nodes[node_id][0], to_path)
             del self.unknown_inactive_nodes[node_id]
             return result.with_target(to_path)
         elif version_spec == 'nightly':
             del self.nightly_inactive_nodes[node_id]
         else:
-            del self.cnr_inactive_nodes[node_id][version_spec]
+            self.remove_from_cnr_inactive_nodes(node_id, version_spec)
 
         self.active_nodes[node_id] = version_spec, to_path
         return result.with_target(to_path)
@@ -1132,7 +1343,7 @@ class UnifiedManager:
             result.append((repo_and_path[1], to_path))
 
             self.unknown_inactive_nodes[node_id] = repo_and_path[0], to_path
-            del self.unknown_active_nodes[node_id]
+            self.remove_unknown_active_node(node_id)
 
             return result
 
@@ -1175,7 +1386,7 @@ class UnifiedManager:
             if repo_and_path is not None and os.path.exists(repo_and_path[1]):
                 rmtree(repo_and_path[1])
                 result.append(repo_and_path[1])
-                del self.unknown_active_nodes[node_id]
+                self.remove_unknown_active_node(node_id)
 
                 is_removed = True
 
@@ -1215,7 +1426,7 @@ class UnifiedManager:
             for key, fullpath in ver_map.items():
                 try_rmtree(node_id, fullpath)
                 result.items.append((key, fullpath))
-            del self.cnr_inactive_nodes[node_id]
+            self.remove_from_cnr_inactive_nodes(node_id)
 
         if len(result.items) == 0:
             return ManagedResult('skip').with_msg('Not installed')
@@ -1294,7 +1505,7 @@ class UnifiedManager:
                 if res != 0:
                     return result.fail(f"Failed to clone repo: {clone_url}")
             else:
-                repo = git.Repo.clone_from(clone_url, repo_path, recursive=True, progress=GitProgress())
+                repo = clone_git_repo(clone_url, repo_path)
                 repo.git.clear_cache()
                 repo.close()
 
@@ -1314,7 +1525,11 @@ class UnifiedManager:
         print("Installation was successful.")
         return result
 
-    def repo_update(self, repo_path, instant_execution=False, no_deps=False, return_postinstall=False):
+    def repo_update(self, repo_path, instant_execution=False, no_deps=False, return_postinstall=False, use_update_check_cache=False):
+        """
+        :param use_update_check_cache: skip the fetch if the update check cache says the pack is up to date (bulk updates only;
+                                       an update the user asked for always fetches)
+        """
         result = ManagedResult('update-git')
 
         if not os.path.exists(os.path.join(repo_path, '.git')):
@@ -1338,6 +1553,10 @@ class UnifiedManager:
             if remote_name is None:
                 return result.fail(f"Failed to get remote when installing: {repo_path}")
 
+            cache_key = get_update_check_cache_key(repo_path, remote_name, branch_name)
+            if use_update_check_cache and cache_key is not None and get_cached_update_check(cache_key, repo.head.commit.hexsha) is False:
+                return ManagedResult('skip').with_msg('Up to date')
+
             remote = repo.remote(name=remote_name)
 
             try:
@@ -1364,11 +1583,17 @@ class UnifiedManager:
             if commit_hash != remote_commit_hash:
                 git_pull(repo_path)
 
+                if cache_key is not None:
+                    set_cached_update_check(cache_key, remote_commit_hash, remote_commit_hash, False)
+                    save_update_check_cache()
+
                 if len(repo.remotes) > 0:
                     url = repo.remotes[0].url
                 else:
                     url = "unknown repo"
 
+                result.to_path = repo_path
+
                 def postinstall():
                     return self.execute_install_script(url, repo_path, instant_execution=instant_execution, no_deps=no_deps)
 
@@ -1380,9 +1605,13 @@ class UnifiedManager:
 
                 return result
             else:
+                if cache_key is not None:
+                    set_cached_update_check(cache_key, remote_commit_hash, commit_hash, False)
+                    save_update_check_cache()
+
                 return ManagedResult('skip').with_msg('Up to date')
 
-    def unified_update(self, node_id, version_spec=None, instant_execution=False, no_deps=False, return_postinstall=False):
+    def unified_update(self, node_id, version_spec=None, instant_execution=False, no_deps=False, return_postinstall=False, use_update_check_cache=False):
         orig_print(f"\x1b[2K\rUpdating: {node_id}", end='')
 
         if version_spec is None:
@@ -1392,12 +1621,72 @@ class UnifiedManager:
             return ManagedResult('update').fail(f'Update not available: {node_id}@{version_spec}').with_ver(version_spec)
 
         if version_spec == 'nightly':
-            return self.repo_update(self.active_nodes[node_id][1], instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall).with_target('nightly').with_ver('nightly')
+            return self.repo_update(self.active_nodes[node_id][1], instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall,
+                                    use_update_check_cache=use_update_check_cache).with_target('nightly').with_ver('nightly')
         elif version_spec == 'unknown':
-            return self.repo_update(self.unknown_active_nodes[node_id][1], instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall).with_target('unknown').with_ver('unknown')
+            return self.repo_update(self.unknown_active_nodes[node_id][1], instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall,
+                                    use_update_check_cache=use_update_check_cache).with_target('unknown').with_ver('unknown')
         else:
             return self.cnr_switch_version(node_id, instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall).with_ver('cnr')
 
+    def unified_update_batch(self, targets, instant_execution=False, no_deps=False, on_done=None):
+        """
+        update many node packs at once (e.g. update all)
+        1. fetch and pull (or switch) all node packs in parallel
+        2. install the requirements of the updated node packs by a single pip install (`execute_install_scripts`)
+        3. run their install scripts
+
+        :param targets: list of (node_id, version_spec)
+        :param on_done: called with (index, ManagedResult) as soon as the result of each target is final.
+                        It may be called from worker threads.
+        :return: list of ManagedResult in the order of `targets`
+        """
+        def update(i):
+            node_id, version_spec = targets[i]
+            try:
+                res = self.unified_update(node_id, version_spec, instant_execution=instant_execution, no_deps=no_deps, return_postinstall=True,
+                                          use_update_check_cache=True)
+            except Exception as e:
+                traceback.print_exc()
+                res = ManagedResult('update').fail(f"An error occurred while updating '{node_id}': {e}")
+
+            if on_done is not None and (not res.result or res.action == 'skip'):
+                on_done(i, res)
+
+            return res
+
+        if not targets:
+            return []
+
+        with ThreadPoolExecutor(max_workers=max(1, min(get_config()['update_workers'], len(targets)))) as executor:
+            results = list(executor.map(update, range(len(targets))))
+
+        updated = [i for i, res in enumerate(results) if res.result and res.action != 'skip']
+
+        # install scripts of pulled/extracted node packs are batched; the other post installs (e.g. reserved switches) run as they are
+        batched = [i for i in updated if results[i].to_path is not None]
+
+        def on_installed(j, ok):
+            i = batched[j]
+            if not ok:
+                results[i].fail(f"Failed to execute install script: {targets[i][0]}@{results[i].ver}")
+
+            if on_done is not None:
+                on_done(i, results[i])
+
+        self.execute_install_scripts([(f"{targets[i][0]}@{results[i].ver}", results[i].to_path) for i in batched],
+                                     instant_execution=instant_execution, no_deps=no_deps, on_done=on_installed)
+
+        for i in updated:
+            if results[i].to_path is None:
+                if not results[i].postinstall():
+                    results[i].fail(f"Failed to execute install script: {targets[i][0]}@{results[i].ver}")
+
+                if on_done is not None:
+                    on_done(i, results[i])
+
+        return results
+
     async def install_by_id(self, node_id: str, version_spec=None, channel=None, mode=None, instant_execution=False, no_deps=False, return_postinstall=False):
         """
         priority if version_spec == None
@@ -1451,7 +1740,7 @@ class UnifiedManager:
             res = self.repo_install(repo_url, to_path, instant_execution=instant_execution, no_deps=no_deps, return_postinstall=return_postinstall)
             if res.result:
                 if version_spec == 'unknown':
-                    self.unknown_active_nodes[node_id] = repo_url, to_path
+                    self.set_unknown_active_node(node_id, repo_url, to_path)
                 elif version_spec == 'nightly':
                     cnr_utils.generate_cnr_id(to_path, node_id)
                     self.active_nodes[node_id] = 'nightly', to_path
@@ -1518,35 +1807,121 @@ def identify_node_pack_from_path(fullpath):
             return module_name, commit_hash, '', github_id
 
 
-def get_installed_node_packs():
-    res = {}
+#
+# Persistent index of the installed node packs
+#
+# Resolved pack information is persisted across restarts, keyed by fullpath and validated by `get_fingerprint`,
+# so only the packs that changed since the last run need to be probed again.
+#
+INSTALLED_PACK_INDEX_VERSION = 3
 
-    for x in get_custom_nodes_paths():
-        for y in os.listdir(x):
-            if y == '__pycache__' or y == '.disabled':
-                continue
+installed_pack_index = None       # fullpath -> {'fingerprint': ..., 'identity': ..., 'package': ...}
+installed_pack_index_dirty = False
+installed_pack_index_lock = threading.Lock()
 
-            fullpath = os.path.join(x, y)
-            info = identify_node_pack_from_path(fullpath)
-            if info is None:
-                continue
 
-            is_disabled = not y.endswith('.disabled')
+def get_installed_pack_index_path():
+    return os.path.join(manager_files_path, 'installed-pack-index.json')
 
-            res[info[0]] = { 'ver': info[1], 'cnr_id': info[2], 'aux_id': info[3], 'enabled': is_disabled }
 
-        disabled_dirs = os.path.join(x, '.disabled')
-        if os.path.exists(disabled_dirs):
-            for y in os.listdir(disabled_dirs):
-                if y == '__pycache__':
-                    continue
+def get_installed_pack_index():
+    global installed_pack_index
+
+    with installed_pack_index_lock:
+        if installed_pack_index is None:
+            installed_pack_index = {}
+            try:
+                with open(get_installed_pack_index_path(), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if data.get('version') == INSTALLED_PACK_INDEX_VERSION:
+                    for k, v in data['packs'].items():
+                        v['fingerprint'] = tuple(tuple(x) if x is not None else None for x in v['fingerprint'])
+                        installed_pack_index[k] = v
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"[ComfyUI-Manager] The installed pack index is ignored: {e}")
+
+    return installed_pack_index
+
+
+def get_installed_pack_index_entry(fullpath, fingerprint, field):
+    entry = get_installed_pack_index().get(fullpath)
+    if entry is not None and entry['fingerprint'] == fingerprint:
+        return entry.get(field)
+
+    return None
+
+
+def set_installed_pack_index_entry(fullpath, fingerprint, field, value):
+    global installed_pack_index_dirty
+
+    index = get_installed_pack_index()
+
+    with installed_pack_index_lock:
+        entry = index.get(fullpath)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            entry = index[fullpath] = {'fingerprint': fingerprint}
+
+        entry[field] = value
+        installed_pack_index_dirty = True
+
+
+def save_installed_pack_index(visited=None):
+    """
+    :param visited: if specified, entries of the other paths are removed
+    """
+    global installed_pack_index_dirty
+
+    index = get_installed_pack_index()
+
+    with installed_pack_index_lock:
+        if visited is not None:
+            for x in set(index.keys()) - visited:
+                del index[x]
+                installed_pack_index_dirty = True
+
+        if not installed_pack_index_dirty:
+            return
+
+        data = json.dumps({'version': INSTALLED_PACK_INDEX_VERSION, 'packs': index}, separators=(',', ':'))
+        installed_pack_index_dirty = False
+
+    try:
+        manager_util.atomic_write(get_installed_pack_index_path(), data)
+    except Exception as e:
+        logging.warning(f"[ComfyUI-Manager] Failed to save the installed pack index: {e}")
 
-                fullpath = os.path.join(disabled_dirs, y)
-                info = identify_node_pack_from_path(fullpath)
-                if info is None:
-                    continue
 
-                res[info[0]] = { 'ver': info[1], 'cnr_id': info[2], 'aux_id': info[3], 'enabled': False }
+def identify_node_pack_from_path_with_index(fullpath, fingerprint=None):
+    if fingerprint is None:
+        fingerprint = get_fingerprint(fullpath)
+
+    identity = get_installed_pack_index_entry(fullpath, fingerprint, 'identity')
+
+    if identity is None:
+        identity = identify_node_pack_from_path(fullpath)
+        set_installed_pack_index_entry(fullpath, fingerprint, 'identity', identity or False)
+    elif identity is False:
+        identity = None
+
+    return identity
+
+
+def get_installed_node_packs():
+    res = {}
+    entries = scan_installed_packs().entries
+
+    infos = map_node_packs(lambda x: identify_node_pack_from_path_with_index(x.fullpath, x.fingerprint) if x.is_dir else None, entries)
+
+    for x, info in zip(entries, infos):
+        if info is None:
+            continue
+
+        res[info[0]] = { 'ver': info[1], 'cnr_id': info[2], 'aux_id': info[3], 'enabled': not x.disabled }
+
+    save_installed_pack_index(set(x.fullpath for x in entries))
 
     return res
 
@@ -1628,6 +2003,18 @@ def write_config():
         'always_lazy_install': get_config()['always_lazy_install'],
         'network_mode': get_config()['network_mode'],
         'db_mode': get_config()['db_mode'],
+        'cache_codec': get_config()['cache_codec'],
+        'db_memory_cache_mb': get_config()['db_memory_cache_mb'],
+        'cache_ttl': get_config()['cache_ttl'],
+        'cache_max_stale_age': get_config()['cache_max_stale_age'],
+        'shared_cache_dir': get_config()['shared_cache_dir'],
+        'update_check_workers': get_config()['update_check_workers'],
+        'update_check_timeout': get_config()['update_check_timeout'],
+        'update_check_total_timeout': get_config()['update_check_total_timeout'],
+        'update_check_method': get_config()['update_check_method'],
+        'update_check_cache_ttl': get_config()['update_check_cache_ttl'],
+        'git_clone_strategy': get_config()['git_clone_strategy'],
+        'update_workers': get_config()['update_workers'],
     }
 
     directory = os.path.dirname(manager_config_path)
@@ -1644,6 +2031,10 @@ def read_config():
         config.read(manager_config_path)
         default_conf = config['default']
         manager_util.use_uv = default_conf['use_uv'].lower() == 'true' if 'use_uv' in default_conf else False
+        manager_util.cache_codec = default_conf.get('cache_codec', 'auto').lower()
+        manager_util.parsed_cache_budget = int(default_conf.get('db_memory_cache_mb', 128)) * 1024 * 1024
+        manager_util.cache_ttl = int(default_conf.get('cache_ttl', 86400))
+        manager_util.cache_max_stale_age = int(default_conf.get('cache_max_stale_age', 604800))
 
         def get_bool(key, default_value):
             return default_conf[key].lower() == 'true' if key in default_conf else False
@@ -1667,10 +2058,26 @@ def read_config():
                     'network_mode': default_conf.get('network_mode', 'public').lower(),
                     'security_level': default_conf.get('security_level', 'normal').lower(),
                     'db_mode': default_conf.get('db_mode', 'cache').lower(),
+                    'cache_codec': default_conf.get('cache_codec', 'auto').lower(),
+                    'db_memory_cache_mb': int(default_conf.get('db_memory_cache_mb', 128)),
+                    'cache_ttl': int(default_conf.get('cache_ttl', 86400)),
+                    'cache_max_stale_age': int(default_conf.get('cache_max_stale_age', 604800)),
+                    'shared_cache_dir': default_conf.get('shared_cache_dir', ''),
+                    'update_check_workers': int(default_conf.get('update_check_workers', 8)),
+                    'update_check_timeout': int(default_conf.get('update_check_timeout', 60)),
+                    'update_check_total_timeout': int(default_conf.get('update_check_total_timeout', 600)),
+                    'update_check_method': default_conf.get('update_check_method', 'ls-remote').lower(),
+                    'update_check_cache_ttl': int(default_conf.get('update_check_cache_ttl', 600)),
+                    'git_clone_strategy': default_conf.get('git_clone_strategy', 'full').lower(),
+                    'update_workers': int(default_conf.get('update_workers', 8)),
                }
 
     except Exception:
         manager_util.use_uv = False
+        manager_util.cache_codec = 'auto'
+        manager_util.parsed_cache_budget = 128 * 1024 * 1024
+        manager_util.cache_ttl = 86400
+        manager_util.cache_max_stale_age = 604800
         return {
             'http_channel_enabled': False,
             'preview_method': manager_funcs.get_current_preview_method(),
@@ -1690,14 +2097,40 @@ def read_config():
             'network_mode': 'public',   # public | private | offline
             'security_level': 'normal', # strong | normal | normal- | weak
             'db_mode': 'cache',         # local | cache | remote
+            'cache_codec': 'auto',      # auto | json | gzip | zstd | msgpack
+            'db_memory_cache_mb': 128,
+            'cache_ttl': 86400,
+            'cache_max_stale_age': 604800,
+            'shared_cache_dir': '',
+            'update_check_workers': 8,
+            'update_check_timeout': 60,
+            'update_check_total_timeout': 600,
+            'update_check_method': 'ls-remote',
+            'update_check_cache_ttl': 600,
+            'git_clone_strategy': 'full',
+            'update_workers': 8,
         }
 
 
+def apply_shared_cache_dir(path):
+    if not path:
+        return
+
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        os.makedirs(path, exist_ok=True)
+        manager_util.cache_dir = path
+        logging.info(f"[ComfyUI-Manager] Using the shared cache dir: {path}")
+    except Exception as e:
+        logging.error(f"[ComfyUI-Manager] Failed to use the shared cache dir '{path}': {e}")
+
+
 def get_config():
     global cached_config
 
     if cached_config is None:
         cached_config = read_config()
+        apply_shared_cache_dir(cached_config['shared_cache_dir'])
         if cached_config['http_channel_enabled']:
             print("[ComfyUI-Manager] Warning: http channel enabled, make sure server in secure env")
 
@@ -1723,6 +2156,19 @@ def get_remote_name(repo):
     return None
 
 
+def clone_git_repo(clone_url, repo_path):
+    """
+    `git.Repo.clone_from` with the options of the `git_clone_strategy` config
+    """
+    strategy = get_config()['git_clone_strategy']
+    options = git_utils.clone_strategies.get(strategy)
+    if options is None:
+        logging.warning(f"[ComfyUI-Manager] Unknown git_clone_strategy '{strategy}'. The full clone is used.")
+        options = []
+
+    return git.Repo.clone_from(clone_url, repo_path, recursive=True, progress=GitProgress(), multi_options=options)
+
+
 def switch_to_default_branch(repo):
     remote_name = get_remote_name(repo)
 
@@ -1778,10 +2224,15 @@ def try_rmtree(title, fullpath):
         reserve_script(title, ["#LAZY-DELETE-NODEPACK", fullpath])
 
 
+def is_lazy_install(instant_execution=False):
+    """
+    whether install scripts are reserved for the next startup instead of being executed now
+    """
+    return not instant_execution and (platform.system() == "Windows" or get_config()['always_lazy_install'])
+
+
 def try_install_script(url, repo_path, install_cmd, instant_execution=False):
-    if not instant_execution and (
-            (len(install_cmd) > 0 and install_cmd[0].startswith('#')) or platform.system() == "Windows" or get_config()['always_lazy_install']
-    ):
+    if (not instant_execution and len(install_cmd) > 0 and install_cmd[0].startswith('#')) or is_lazy_install(instant_execution):
         reserve_script(repo_path, install_cmd)
         return True
     else:
@@ -2047,6 +2498,320 @@ def git_repo_update_check_with(path, do_fetch=False, do_update=False, no_deps=Fa
     return False, True
 
 
+#
+# Update check cache
+#
+# The remote branch tips found by update checks are kept per (normalized remote url, branch) and persisted,
+# so that update checks repeated within `update_check_cache_ttl` seconds don't hit the network again.
+#
+UPDATE_CHECK_CACHE_VERSION = 1
+
+update_check_cache = None         # 'url#branch' -> {'tip': ..., 'head': ..., 'updatable': ..., 'checked_at': ...}
+update_check_cache_dirty = False
+update_check_cache_lock = threading.Lock()
+
+
+def get_update_check_cache_path():
+    return os.path.join(manager_files_path, 'update-check-cache.json')
+
+
+def get_update_check_cache():
+    global update_check_cache
+
+    with update_check_cache_lock:
+        if update_check_cache is None:
+            update_check_cache = {}
+            try:
+                with open(get_update_check_cache_path(), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if data.get('version') == UPDATE_CHECK_CACHE_VERSION:
+                    update_check_cache.update(data['remotes'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"[ComfyUI-Manager] The update check cache is ignored: {e}")
+
+    return update_check_cache
+
+
+def get_update_check_cache_key(path, remote_name, branch_name):
+    url = dict(git_utils.get_remote_urls(path) or []).get(remote_name)
+    if url is None:
+        return None
+
+    url = git_utils.normalize_url(url).rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-4]
+
+    return f"{url.lower()}#{branch_name}"
+
+
+def get_cached_update_check(key, commit_hash):
+    """
+    :return: update state if a fresh result for the local `commit_hash` is cached, otherwise None
+    """
+    entry = get_update_check_cache().get(key)
+    if entry is None or time.time() - entry['checked_at'] >= get_config()['update_check_cache_ttl']:
+        return None
+
+    if entry['tip'] == commit_hash:
+        return False
+    elif entry['head'] == commit_hash:
+        return entry['updatable']
+
+    return None
+
+
+def get_update_check_branch(path):
+    """
+    :return: git dirs * remote name * branch name (None if HEAD is detached)
+    """
+    git_dirs = git_utils.get_git_dirs(path)
+    if git_dirs is None:
+        raise ValueError(f'[ComfyUI-Manager] Not a valid git repository: {path}')
+
+    remotes = sorted(set(name for name, _ in git_utils.get_remote_urls(path) or []))  # same order as `git remote`
+    if 'origin' in remotes:
+        remote_name = 'origin'
+    elif 'upstream' in remotes:
+        remote_name = 'upstream'
+    elif remotes:
+        remote_name = remotes[0]
+    else:
+        raise ValueError(f"No remotes are configured for this repository: {path}")
+
+    head = git_utils.read_git_file(os.path.join(git_dirs[0], 'HEAD'), git_utils.parse_first_line) or ''
+    if not head.startswith('ref: refs/heads/'):
+        return git_dirs, remote_name, None
+
+    return git_dirs, remote_name, head[16:].strip()
+
+
+def get_cached_update_state(path):
+    """
+    Update state of the git node pack at `path` as far as the update check cache knows, without running git.
+
+    :return: True/False, or None if there is no fresh result for the current HEAD
+    """
+    try:
+        _, remote_name, branch_name = get_update_check_branch(path)
+    except ValueError:
+        return None
+
+    if branch_name is None:
+        return True  # detached branch is treated as updatable
+
+    cache_key = get_update_check_cache_key(path, remote_name, branch_name)
+    if cache_key is None:
+        return None
+
+    return get_cached_update_check(cache_key, git_utils.get_commit_hash(path))
+
+
+def set_cached_update_check(key, remote_commit_hash, commit_hash, updatable):
+    global update_check_cache_dirty
+
+    cache = get_update_check_cache()
+
+    with update_check_cache_lock:
+        cache[key] = {'tip': remote_commit_hash, 'head': commit_hash, 'updatable': updatable, 'checked_at': time.time()}
+        update_check_cache_dirty = True
+
+
+def save_update_check_cache():
+    global update_check_cache_dirty
+
+    cache = get_update_check_cache()
+    ttl = get_config()['update_check_cache_ttl']
+
+    with update_check_cache_lock:
+        if not update_check_cache_dirty:
+            return
+
+        now = time.time()
+        for k in [k for k, v in cache.items() if now - v['checked_at'] >= ttl]:
+            del cache[k]
+
+        data = json.dumps({'version': UPDATE_CHECK_CACHE_VERSION, 'remotes': cache}, separators=(',', ':'))
+        update_check_cache_dirty = False
+
+    try:
+        manager_util.atomic_write(get_update_check_cache_path(), data)
+    except Exception as e:
+        logging.warning(f"[ComfyUI-Manager] Failed to save the update check cache: {e}")
+
+
+#
+# Async update checker
+#
+# Checks many git node packs concurrently with `git` subprocesses instead of GitPython,
+# so that a hung remote can be timed out and killed without stalling the whole check.
+#
+class GitCommandError(Exception):
+    pass
+
+
+async def run_git_command(args, cwd, timeout=None, extra_env=None):
+    """
+    run `git <args>` in `cwd` and return its stdout.
+    The process is killed on timeout or cancellation.
+    """
+    git_exe = get_config().get('git_exe') or 'git'
+    env = dict(get_script_env(), GIT_TERMINAL_PROMPT='0', **(extra_env or {}))  # never wait for credentials of a gone repository
+
+    try:
+        # on POSIX, git runs in its own process group so that helpers it spawns (ssh, upload-pack, ...)
+        # die with it; otherwise they keep the pipes open and the kill never completes.
+        process = await asyncio.create_subprocess_exec(git_exe, *args, cwd=cwd, env=env,
+                                                       stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                                       start_new_session=(os.name != 'nt'))
+    except NotImplementedError:
+        # the selector event loop on Windows doesn't support subprocesses
+        process = subprocess.Popen([git_exe, *args], cwd=cwd, env=env,
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(asyncio.to_thread(process.communicate), timeout)
+        except BaseException:  # timeout or cancellation
+            process.kill()
+            raise
+
+        if process.returncode != 0:
+            raise GitCommandError(stderr.decode('utf-8', errors='replace').strip())
+        return stdout.decode('utf-8', errors='replace').strip()
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:  # timeout or cancellation
+        if process.returncode is None:
+            if os.name != 'nt':
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            else:
+                process.kill()
+
+            # reap the child even if this task is cancelled again while waiting
+            await asyncio.shield(process.wait())
+        raise
+
+    if process.returncode != 0:
+        raise GitCommandError(stderr.decode('utf-8', errors='replace').strip())
+
+    return stdout.decode('utf-8', errors='replace').strip()
+
+
+async def git_repo_update_check_async(path, do_fetch=False, timeout=None, force=False):
+    """
+    async version of `git_repo_update_check_with` for the update check only (no update)
+
+    With `do_fetch` and the `ls-remote` update check method, only the tip of the remote branch is probed
+    and no objects are downloaded; fetching is left to the actual update.
+    Results of `do_fetch` are cached per remote branch unless `force` is set.
+
+    :return: update state * success
+    """
+    git_dirs, remote_name, branch_name = get_update_check_branch(path)
+    if branch_name is None:
+        return True, True  # detached branch is treated as updatable
+
+    commit_hash = git_utils.get_commit_hash(path)
+
+    cache_key = get_update_check_cache_key(path, remote_name, branch_name) if do_fetch else None
+    if cache_key is not None and not force:
+        updatable = get_cached_update_check(cache_key, commit_hash)
+        if updatable is not None:
+            return updatable, True
+
+    probe_only = do_fetch and get_config()['update_check_method'] == 'ls-remote'
+
+    if probe_only:
+        refs = await run_git_command(['ls-remote', remote_name, f'refs/heads/{branch_name}'], path, timeout)
+        remote_commit_hash = refs.split()[0] if refs else None
+    else:
+        if do_fetch:
+            await run_git_command(['fetch', remote_name], path, timeout)
+        remote_commit_hash = git_utils.resolve_git_ref(git_dirs[0], git_dirs[1], f'refs/remotes/{remote_name}/{branch_name}')
+
+    updatable = False
+    if remote_commit_hash is None:
+        updatable = True  # Assuming there's an update if it's not the default branch.
+    elif commit_hash != remote_commit_hash and probe_only:
+        # The remote tip is not fetched, so only the local history can tell: if the tip is already in it,
+        # the local branch is ahead of the remote. Otherwise (a new or rewritten remote tip) there is something to pull.
+        # NOTE: GIT_NO_LAZY_FETCH keeps a partial clone from downloading missing objects for this check.
+        try:
+            await run_git_command(['merge-base', '--is-ancestor', remote_commit_hash, commit_hash], path, timeout,
+                                  extra_env={'GIT_NO_LAZY_FETCH': '1'})
+        except GitCommandError:
+            updatable = True
+    elif commit_hash != remote_commit_hash:
+        # Compare the commit dates to determine if the local repository is behind the remote repository
+        dates = await run_git_command(['show', '-s', '--format=%ct', commit_hash, remote_commit_hash], path, timeout)
+        commit_date, remote_commit_date = [int(x) for x in dates.split()]
+        updatable = commit_date < remote_commit_date
+
+    if cache_key is not None:
+        set_cached_update_check(cache_key, remote_commit_hash, commit_hash, updatable)
+
+    return updatable, True
+
+
+async def check_git_repos_update(paths, do_fetch=False, workers=None, timeout=None, total_timeout=None, on_progress=None, force=False):
+    """
+    check the updates of git repositories concurrently
+
+    :param workers, timeout, total_timeout: defaults are `update_check_workers`, `update_check_timeout` (per repository)
+                                            and `update_check_total_timeout` of the config
+    :param on_progress: called with (path, update state, success, done count, total count) whenever a repository is checked
+    :param force: ignore the cached results of the update check cache
+    :return: path -> update state * success. Repositories that failed or timed out are (False, False).
+    """
+    workers = workers or get_config()['update_check_workers']
+    timeout = timeout or get_config()['update_check_timeout']
+    total_timeout = total_timeout or get_config()['update_check_total_timeout']
+
+    semaphore = asyncio.Semaphore(max(workers, 1))
+    results = {x: (False, False) for x in paths}
+    done_count = 0
+
+    async def check(path):
+        nonlocal done_count
+
+        async with semaphore:
+            try:
+                results[path] = await asyncio.wait_for(git_repo_update_check_async(path, do_fetch, timeout, force), timeout)
+            except asyncio.TimeoutError:
+                logging.error(f"[ComfyUI-Manager] Update check timed out: {path}")
+            except Exception as e:
+                logging.error(f"[ComfyUI-Manager] Failed to check state of the git node pack: {path}\n{e}")
+
+        done_count += 1
+        if on_progress is not None:
+            on_progress(path, *results[path], done_count, len(paths))
+
+    tasks = [asyncio.create_task(check(x)) for x in paths]
+    if not tasks:
+        return results
+
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=total_timeout)
+        if pending:
+            logging.error(f"[ComfyUI-Manager] Update check timed out: {len(pending)} git node packs are not checked.")
+    finally:
+        # also on cancellation of the caller (e.g. the client went away): stop every check and its git process
+        pending = [x for x in tasks if not x.done()]
+        for x in pending:
+            x.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    save_update_check_cache()
+
+    return results
+
+
 class GitProgress(RemoteProgress):
     def __init__(self):
         super().__init__()
@@ -2133,8 +2898,9 @@ async def gitclone_install(url, instant_execution=False, msg_prefix='', no_deps=
                 if res != 0:
                     return result.fail(f"Failed to clone '{clone_url}' into  '{repo_path}'")
             else:
-                repo = git.Repo.clone_from(clone_url, repo_path, recursive=True, progress=GitProgress())
+                repo = clone_git_repo(clone_url, repo_path)
                 if commit_id!= "":
+                    git_utils.fetch_commit(repo, commit_id)
                     repo.git.checkout(commit_id)
                     repo.git.submodule('update', '--init', '--recursive')
 
@@ -2183,42 +2949,50 @@ def git_pull(path):
 
 
 async def get_data_by_mode(mode, filename, channel_url=None):
+    """
+    NOTE: The returned object is shared through the parsed-object cache of `manager_util`. Do not modify it in place.
+    """
     if channel_url in get_channel_dict():
         channel_url = get_channel_dict()[channel_url]
 
+    def load(path, key_mode=mode):
+        return manager_util.load_document((channel_url, filename, key_mode), path)
+
     try:
         local_uri = os.path.join(manager_util.comfyui_manager_path, filename)
 
         if mode == "local":
-            json_obj = await manager_util.get_data(local_uri)
+            json_obj = load(local_uri)
         else:
             if channel_url is None:
                 uri = get_config()['channel_url'] + '/' + filename
             else:
                 uri = channel_url + '/' + filename
 
-            cache_uri = str(manager_util.simple_hash(uri))+'_'+filename
+            cache_uri = str(manager_util.simple_hash(uri))+'_'+os.path.splitext(filename)[0]+manager_util.get_cache_ext()
             cache_uri = os.path.join(manager_util.cache_dir, cache_uri)
 
             if get_config()['network_mode'] == 'offline':
                 # offline network mode
                 if os.path.exists(cache_uri):
-                    json_obj = await manager_util.get_data(cache_uri)
+                    json_obj = load(cache_uri)
                 else:
                     local_uri = os.path.join(manager_util.comfyui_manager_path, filename)
                     if os.path.exists(local_uri):
-                        json_obj = await manager_util.get_data(local_uri)
+                        json_obj = load(local_uri, 'local')
                     else:
                         json_obj = {}  # fallback
             else:
                 # public network mode
-                if mode == "cache" and manager_util.is_file_created_within_one_day(cache_uri):
-                    json_obj = await manager_util.get_data(cache_uri)
+                freshness = manager_util.get_cache_freshness(cache_uri) if mode == "cache" else None
+
+                if freshness == 'fresh':
+                    json_obj = load(cache_uri)
+                elif freshness == 'stale':
+                    manager_util.revalidate_in_background(uri, cache_uri)
+                    json_obj = load(cache_uri)
                 else:
-                    json_obj = await manager_util.get_data(uri)
-                    with manager_util.cache_lock:
-                        with open(cache_uri, "w", encoding='utf-8') as file:
-                            json.dump(json_obj, file, indent=4, sort_keys=True)
+                    json_obj = await manager_util.fetch_to_cache(uri, cache_uri)
     except Exception as e:
         print(f"[ComfyUI-Manager] Due to a network error, switching to local mode.\n=> {filename}\n=> {e}")
         uri = os.path.join(manager_util.comfyui_manager_path, filename)
@@ -2521,24 +3295,45 @@ def update_path(repo_path, instant_execution=False, no_deps=False):
         return "skipped"
 
 
-def lookup_customnode_by_url(data, target):
+customnode_url_index = None  # custom node list * (url -> first item containing the url)
+
+
+def get_customnode_url_index(data):
+    global customnode_url_index
+
+    # the parsed custom node list is shared by the document cache, so the index is reused while the list is unchanged
+    cached = customnode_url_index
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    index = {}
     for x in data['custom_nodes']:
-        if target in x['files']:
-            for custom_nodes_dir in get_custom_nodes_paths():
-                dir_name = os.path.splitext(os.path.basename(target))[0].replace(".git", "")
-                dir_path = os.path.join(custom_nodes_dir, dir_name)
-                if os.path.exists(dir_path):
-                    x['installed'] = 'True'
-                else:
-                    disabled_path1 = os.path.join(custom_nodes_dir, '.disabled', dir_name)
-                    disabled_path2 = dir_path + ".disabled"
+        for url in x['files']:
+            index.setdefault(url, x)
 
-                    if os.path.exists(disabled_path1) or os.path.exists(disabled_path2):
-                        x['installed'] = 'Disabled'
-                    else:
-                        continue
+    customnode_url_index = data, index
+    return index
 
-                return x
+
+def lookup_customnode_by_url(data, target):
+    x = get_customnode_url_index(data).get(target)
+    if x is not None:
+        x = dict(x)
+        for custom_nodes_dir in get_custom_nodes_paths():
+            dir_name = os.path.splitext(os.path.basename(target))[0].replace(".git", "")
+            dir_path = os.path.join(custom_nodes_dir, dir_name)
+            if os.path.exists(dir_path):
+                x['installed'] = 'True'
+            else:
+                disabled_path1 = os.path.join(custom_nodes_dir, '.disabled', dir_name)
+                disabled_path2 = dir_path + ".disabled"
+
+                if os.path.exists(disabled_path1) or os.path.exists(disabled_path2):
+                    x['installed'] = 'Disabled'
+                else:
+                    continue
+
+            return x
 
     return None
 
@@ -2567,14 +3362,18 @@ def simple_check_custom_node(url):
     return 'not-installed'
 
 
-def check_state_of_git_node_pack_single(item, do_fetch=False, do_update_check=True, do_update=False):
+def get_git_node_pack_path(item):
     if item['version'] == 'unknown':
-        dir_path = unified_manager.unknown_active_nodes.get(item['id'])[1]
+        return unified_manager.unknown_active_nodes.get(item['id'])[1]
     elif item['version'] == 'nightly':
-        dir_path = unified_manager.active_nodes.get(item['id'])[1]
+        return unified_manager.active_nodes.get(item['id'])[1]
     else:
         # skip CNR nodes
-        dir_path = None
+        return None
+
+
+def check_state_of_git_node_pack_single(item, do_fetch=False, do_update_check=True, do_update=False):
+    dir_path = get_git_node_pack_path(item)
 
     if dir_path and os.path.exists(dir_path):
         if do_update_check:
@@ -2617,58 +3416,56 @@ async def get_current_snapshot(custom_nodes_only = False):
     comfyui_commit_hash = None
     if not custom_nodes_only:
         if os.path.exists(os.path.join(repo_path, '.git')):
-            repo = git.Repo(repo_path)
-            comfyui_commit_hash = repo.head.commit.hexsha
+            comfyui_commit_hash = git_utils.get_commit_hash(repo_path)
         
     git_custom_nodes = {}
     cnr_custom_nodes = {}
     file_custom_nodes = []
 
-    # Get custom nodes hash
-    for custom_nodes_dir in get_custom_nodes_paths():
-        paths = os.listdir(custom_nodes_dir)
+    def probe(fullpath):
+        try:
+            info = unified_manager.resolve_from_path(fullpath)
 
-        disabled_path = os.path.join(custom_nodes_dir, '.disabled')
-        if os.path.exists(disabled_path):
-            for x in os.listdir(disabled_path):
-                paths.append(os.path.join(disabled_path, x))
+            if info is None or info['ver'] not in ['nightly', 'latest', 'unknown']:
+                return info, None, None
 
-        for path in paths:
-            if path in ['.disabled', '__pycache__']:
-                continue
+            return info, git_utils.get_commit_hash(fullpath), git_utils.git_url(fullpath)
+        except:
+            return False, None, None
 
-            fullpath = os.path.join(custom_nodes_dir, path)
+    # Get custom nodes hash
+    entries = scan_installed_packs().entries
+    probed = map_node_packs(lambda x: probe(x.fullpath) if x.is_dir else None, entries)
 
-            if os.path.isdir(fullpath):
-                is_disabled = path.endswith(".disabled") or os.path.basename(os.path.dirname(fullpath)) == ".disabled"
+    for x, probe_result in zip(entries, probed):
+        if x.is_dir:
+            is_disabled = x.disabled
+            info, commit_hash, url = probe_result
 
-                try:
-                    info = unified_manager.resolve_from_path(fullpath)
+            if info is False:
+                print(f"Failed to extract snapshots for the custom node '{x.name}'.")
+                continue
 
-                    if info is None:
-                        continue
+            if info is None:
+                continue
 
-                    if info['ver'] not in ['nightly', 'latest', 'unknown']:
-                        if is_disabled:
-                            continue  # don't restore disabled state of CNR node.
+            if info['ver'] not in ['nightly', 'latest', 'unknown']:
+                if is_disabled:
+                    continue  # don't restore disabled state of CNR node.
 
-                        cnr_custom_nodes[info['id']] = info['ver']
-                    else:
-                        commit_hash = git_utils.get_commit_hash(fullpath)
-                        url = git_utils.git_url(fullpath)
-                        git_custom_nodes[url] = dict(hash=commit_hash, disabled=is_disabled)
-                except:
-                    print(f"Failed to extract snapshots for the custom node '{path}'.")
+                cnr_custom_nodes[info['id']] = info['ver']
+            else:
+                git_custom_nodes[url] = dict(hash=commit_hash, disabled=is_disabled)
 
-            elif path.endswith('.py'):
-                is_disabled = path.endswith(".py.disabled")
-                filename = os.path.basename(path)
-                item = {
-                    'filename': filename,
-                    'disabled': is_disabled
-                }
+        elif x.name.endswith('.py'):
+            is_disabled = x.name.endswith(".py.disabled")
+            filename = x.name
+            item = {
+                'filename': filename,
+                'disabled': is_disabled
+            }
 
-                file_custom_nodes.append(item)
+            file_custom_nodes.append(item)
 
     pip_packages = None if custom_nodes_only else get_installed_pip_packages()
 
@@ -2860,7 +3657,8 @@ def map_to_unified_keys(json_obj):
 async def get_unified_total_nodes(channel, mode, regsitry_cache_mode='cache'):
     await unified_manager.reload(regsitry_cache_mode)
 
-    res = await unified_manager.get_custom_nodes(channel, mode)
+    # per-request overlay: the shared catalog stays untouched, and state fields are set on shallow copies
+    res = {k: dict(v) for k, v in (await unified_manager.get_custom_nodes(channel, mode)).items()}
 
     # collect pure cnr ids (i.e. not exists in custom-node-list.json)
     # populate state/updatable field to non-pure cnr nodes
@@ -2987,6 +3785,19 @@ async def get_unified_total_nodes(channel, mode, regsitry_cache_mode='cache'):
     return res
 
 
+async def get_catalog_generation(channel, mode):
+    """
+    Generation of the data the unified node list is built from: the installed node packs, the DB documents and
+    the ComfyRegistry catalog (both the synced file and the loaded maps). If it is unchanged, the previously built list can be reused.
+    """
+    # loading the documents through the parsed-object cache is cheap, and it revalidates expired caches in the background
+    await get_data_by_mode(mode, 'custom-node-list.json', channel_url=normalize_channel(channel))
+    await get_data_by_mode(mode, 'github-stats.json', 'default')
+    await get_data_by_mode(mode, 'extras.json', 'default')
+
+    return scan_installed_packs().generation, manager_util.document_generation, cnr_utils.get_sync_state(), unified_manager.cnr_generation
+
+
 def populate_github_stats(node_packs, json_obj_github):
     for k, v in node_packs.items():
         try:
@@ -3243,9 +4054,19 @@ async def restore_snapshot(snapshot_path, git_helper_extras=None):
             repo_name = repo_name[:-4]
 
         to_path = os.path.join(get_default_custom_nodes_path(), repo_name)
-        unified_manager.repo_install(repo_url, to_path, instant_execution=True, no_deps=False, return_postinstall=False)
+        res = unified_manager.repo_install(repo_url, to_path, instant_execution=True, no_deps=False, return_postinstall=True)
         cloned_repos.append(repo_name)
 
+        if res.result:
+            # the install scripts and requirements must be the ones of the snapshot commit, not the ones of HEAD
+            if git_info[repo_url].get('hash'):
+                repo_switch_commit(to_path, git_info[repo_url]['hash'])
+
+            if not res.postinstall():
+                failed.append(repo_name)
+
+    invalidate_installed_packs()
+
     # print summary
     for x in cloned_repos:
         print(f"[ INSTALLED ] {x}")
@@ -3321,17 +4142,13 @@ def resolve_giturl_from_path(fullpath):
     """
     resolve giturl path of unclassified custom node based on remote url in .git/config
     """
-    git_config_path = os.path.join(fullpath, '.git', 'config')
+    remote_urls = git_utils.get_remote_urls(fullpath)
 
-    if not os.path.exists(git_config_path):
+    if remote_urls is None:
         return "unknown"
 
-    config = configparser.ConfigParser(strict=False)
-    config.read(git_config_path)
-
-    for k, v in config.items():
-        if k.startswith('remote ') and 'url' in v:
-            return v['url'].replace("git@github.com:", "https://github.com/")
+    for _, url in remote_urls:
+        return url.replace("git@github.com:", "https://github.com/")
 
     return None
 
@@ -3342,6 +4159,7 @@ def repo_switch_commit(repo_path, commit_hash):
         if repo.head.commit.hexsha == commit_hash:
             return False
 
+        git_utils.fetch_commit(repo, commit_hash)
         repo.git.checkout(commit_hash)
         return True
     except:
@@ -4,6 +4,9 @@ import folder_paths
 import locale
 import subprocess  # don't remove this
 import concurrent
+import functools
+import gzip
+import hashlib
 import nodes
 import os
 import sys
@@ -338,7 +341,7 @@ def get_model_path(data, show_log=False):
             return os.path.join(base_model, data['filename'])
 
 
-def check_state_of_git_node_pack(node_packs, do_fetch=False, do_update_check=True, do_update=False):
+async def check_state_of_git_node_pack(node_packs, do_fetch=False, do_update_check=True, do_update=False, force=False):
     if do_fetch:
         print("Start fetching...", end="")
     elif do_update:
@@ -346,14 +349,36 @@ def check_state_of_git_node_pack(node_packs, do_fetch=False, do_update_check=Tru
     elif do_update_check:
         print("Start update check...", end="")
 
-    def process_custom_node(item):
-        core.check_state_of_git_node_pack_single(item, do_fetch, do_update_check, do_update)
+    items = [v for v in node_packs.values() if v.get('active_version') in ['unknown', 'nightly']]
 
-    with concurrent.futures.ThreadPoolExecutor(4) as executor:
-        for k, v in node_packs.items():
-            if v.get('active_version') in ['unknown', 'nightly']:
+    if do_update:
+        def process_custom_node(item):
+            core.check_state_of_git_node_pack_single(item, do_fetch, do_update_check, do_update)
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            for v in items:
                 executor.submit(process_custom_node, v)
 
+    elif do_update_check:
+        path_to_items = {}
+        for v in items:
+            dir_path = core.get_git_node_pack_path(v)
+            if dir_path and os.path.exists(dir_path):
+                path_to_items.setdefault(dir_path, []).append(v)
+
+        def on_progress(path, update_state, success, done_count, total_count):
+            for v in path_to_items[path]:
+                PromptServer.instance.send_sync("cm-update-check-progress",
+                                                {'id': v['id'], 'update_state': update_state, 'success': success,
+                                                 'done_count': done_count, 'total_count': total_count})
+
+        results = await core.check_git_repos_update(list(path_to_items.keys()), do_fetch, on_progress=on_progress, force=force)
+
+        for path, (update_state, _) in results.items():
+            if update_state:
+                for v in path_to_items[path]:
+                    v['update-state'] = 'true'
+
     if do_fetch:
         print("\x1b[2K\rFetching done.")
     elif do_update:
@@ -432,44 +457,74 @@ async def task_worker():
             traceback.print_exc()
             return f"Installation failed:\n{node_spec_str}"
 
+    def make_update_result(node_name, res):
+        if res.ver == 'unknown':
+            url = core.unified_manager.unknown_active_nodes[node_name][0]
+            try:
+                title = os.path.basename(url)
+            except Exception:
+                title = node_name
+        else:
+            url = core.unified_manager.cnr_map[node_name].get('repository')
+            title = core.unified_manager.cnr_map[node_name]['name']
+
+        if url is not None:
+            base_res = {'url': url, 'title': title}
+        else:
+            base_res = {'title': title}
+
+        if res.result:
+            if res.action == 'skip':
+                base_res['msg'] = 'skip'
+                return base_res
+            else:
+                base_res['msg'] = 'success'
+                return base_res
+
+        base_res['msg'] = f"An error occurred while updating '{node_name}'."
+        logging.error(f"\nERROR: An error occurred while updating '{node_name}'. (res.result={res.result}, res.action={res.action})")
+        return base_res
+
     async def do_update(item):
         ui_id, node_name, node_ver = item
 
         try:
             res = core.unified_manager.unified_update(node_name, node_ver)
-
-            if res.ver == 'unknown':
-                url = core.unified_manager.unknown_active_nodes[node_name][0]
-                try:
-                    title = os.path.basename(url)
-                except Exception:
-                    title = node_name
-            else:
-                url = core.unified_manager.cnr_map[node_name].get('repository')
-                title = core.unified_manager.cnr_map[node_name]['name']
-
             manager_util.clear_pip_cache()
+            return make_update_result(node_name, res)
+        except Exception:
+            traceback.print_exc()
 
-            if url is not None:
-                base_res = {'url': url, 'title': title}
-            else:
-                base_res = {'title': title}
+        return {'msg':f"An error occurred while updating '{node_name}'."}
 
-            if res.result:
-                if res.action == 'skip':
-                    base_res['msg'] = 'skip'
-                    return base_res
-                else:
-                    base_res['msg'] = 'success'
-                    return base_res
+    async def do_update_batch(items, on_item_done):
+        """
+        the 'update-main' tasks of update all are processed together by `unified_update_batch`:
+        parallel pulls, a single pip install for the requirements, and then the install scripts.
+        `on_item_done(item, msg)` is called for each task as soon as its result is final.
+        """
+        reported = set()
+
+        def on_done(i, res):
+            ui_id, node_name, node_ver = items[i]
+            try:
+                msg = make_update_result(node_name, res)
+            except Exception:
+                traceback.print_exc()
+                msg = {'msg': f"An error occurred while updating '{node_name}'."}
+
+            reported.add(i)
+            on_item_done(items[i], msg)
 
-            base_res['msg'] = f"An error occurred while updating '{node_name}'."
-            logging.error(f"\nERROR: An error occurred while updating '{node_name}'. (res.result={res.result}, res.action={res.action})")
-            return base_res
+        try:
+            core.unified_manager.unified_update_batch([(x[1], x[2]) for x in items], on_done=on_done)
+            manager_util.clear_pip_cache()
         except Exception:
             traceback.print_exc()
 
-        return {'msg':f"An error occurred while updating '{node_name}'."}
+        for i, x in enumerate(items):
+            if i not in reported:
+                on_item_done(x, {'msg': f"An error occurred while updating '{x[1]}'."})
 
     async def do_update_comfyui(is_stable) -> str:
         try:
@@ -595,6 +650,36 @@ async def task_worker():
 
     stats = {}
 
+    def finish_task(kind, item, msg, done_count, total_count):
+        if kind != 'install-model':
+            core.invalidate_installed_packs()
+
+        with task_worker_lock:
+            tasks_in_progress.remove((kind, item[0]))
+
+            ui_id = item[0]
+            if kind == 'install-model':
+                model_result[ui_id] = msg
+                ui_target = "model_manager"
+            elif kind == 'update-main':
+                nodepack_result[ui_id] = msg
+                ui_target = "main"
+            elif kind == 'update-comfyui':
+                nodepack_result['comfyui'] = msg
+                ui_target = "main"
+            elif kind == 'update':
+                nodepack_result[ui_id] = msg['msg']
+                ui_target = "nodepack_manager"
+            else:
+                nodepack_result[ui_id] = msg
+                ui_target = "nodepack_manager"
+
+        stats[kind] = stats.get(kind, 0) + 1
+
+        PromptServer.instance.send_sync("cm-queue-status",
+                                        {'status': 'in_progress', 'target': item[0], 'ui_target': ui_target,
+                                         'total_count': total_count, 'done_count': done_count})
+
     while True:
         done_count = len(nodepack_result) + len(model_result)
         total_count = done_count + task_queue.qsize()
@@ -615,6 +700,27 @@ async def task_worker():
             kind, item = task_queue.get()
             tasks_in_progress.add((kind, item[0]))
 
+            if kind == 'update-main':
+                # the following 'update-main' tasks (update all) are taken together
+                items = [item]
+                while not task_queue.empty() and task_queue.queue[0][0] == 'update-main':
+                    items.append(task_queue.get()[1])
+                    tasks_in_progress.add((kind, items[-1][0]))
+
+        if kind == 'update-main':
+            done_lock = threading.Lock()
+
+            def on_item_done(x, msg):
+                nonlocal done_count
+
+                # called from the update threads as each node pack finishes
+                with done_lock:
+                    finish_task(kind, x, msg, done_count, total_count)
+                    done_count += 1
+
+            await do_update_batch(items, on_item_done)
+            continue
+
         try:
             if kind == 'install':
                 msg = await do_install(item)
@@ -622,8 +728,6 @@ async def task_worker():
                 msg = await do_install_model(item)
             elif kind == 'update':
                 msg = await do_update(item)
-            elif kind == 'update-main':
-                msg = await do_update(item)
             elif kind == 'update-comfyui':
                 msg = await do_update_comfyui(item[1])
             elif kind == 'fix':
@@ -638,31 +742,7 @@ async def task_worker():
             traceback.print_exc()
             msg = f"Exception: {(kind, item)}"
 
-        with task_worker_lock:
-            tasks_in_progress.remove((kind, item[0]))
-
-            ui_id = item[0]
-            if kind == 'install-model':
-                model_result[ui_id] = msg
-                ui_target = "model_manager"
-            elif kind == 'update-main':
-                nodepack_result[ui_id] = msg
-                ui_target = "main"
-            elif kind == 'update-comfyui':
-                nodepack_result['comfyui'] = msg
-                ui_target = "main"
-            elif kind == 'update':
-                nodepack_result[ui_id] = msg['msg']
-                ui_target = "nodepack_manager"
-            else:
-                nodepack_result[ui_id] = msg
-                ui_target = "nodepack_manager"
-
-        stats[kind] = stats.get(kind, 0) + 1
-
-        PromptServer.instance.send_sync("cm-queue-status",
-                                        {'status': 'in_progress', 'target': item[0], 'ui_target': ui_target,
-                                         'total_count': total_count, 'done_count': done_count})
+        finish_task(kind, item, msg, done_count, total_count)
 
 
 @routes.get("/customnode/getmappings")
@@ -679,6 +759,7 @@ async def fetch_customnode_mappings(request):
 
     json_obj = await core.get_data_by_mode(mode, 'extension-node-map.json')
     json_obj = core.map_to_unified_keys(json_obj)
+    json_obj = {k: [list(v[0]), *v[1:]] for k, v in json_obj.items()}  # node lists are modified below
 
     if nickname_mode:
         json_obj = nickname_filter(json_obj)
@@ -712,14 +793,25 @@ async def fetch_updates(request):
         await core.unified_manager.reload(request.rel_url.query["mode"])
         await core.unified_manager.get_custom_nodes(channel, request.rel_url.query["mode"])
 
-        res = core.unified_manager.fetch_or_pull_git_repo(is_pull=False)
+        path_to_items = {}
+        for k, v in core.unified_manager.unknown_active_nodes.items():
+            path_to_items.setdefault(v[1], []).append(f"{k}@unknown")
+
+        for k, v in core.unified_manager.active_nodes.items():
+            if v[0] == 'nightly':
+                path_to_items.setdefault(v[1], []).append(f"{k}@nightly")
+
+        force = request.rel_url.query.get("force", '').lower() == "true"
+        results = await core.check_git_repos_update(list(path_to_items.keys()), do_fetch=True, force=force)
 
-        for x in res['failed']:
-            logging.error(f"FETCH FAILED: {x}")
+        for path, (_, success) in results.items():
+            if not success:
+                for x in path_to_items[path]:
+                    logging.error(f"FETCH FAILED: {x}")
 
         logging.info("\nDone.")
 
-        if len(res['updated']) > 0:
+        if any(update_state for update_state, _ in results.values()):
             return web.Response(status=201)
 
         return web.Response(status=200)
@@ -803,9 +895,15 @@ def convert_markdown_to_html(input_text):
     return result_text.replace("\n", "<BR>")
 
 
+@functools.lru_cache(maxsize=8192)
+def render_description(description):
+    # descriptions rarely change, so they are rendered once instead of on every list request
+    return convert_markdown_to_html(manager_util.sanitize_tag(description))
+
+
 def populate_markdown(x):
     if 'description' in x:
-        x['description'] = convert_markdown_to_html(manager_util.sanitize_tag(x['description']))
+        x['description'] = render_description(x['description'])
 
     if 'name' in x:
         x['name'] = manager_util.sanitize_tag(x['name'])
@@ -828,6 +926,77 @@ async def installed_list(request):
     return web.json_response(res, content_type='application/json')
 
 
+# (channel, mode) -> finished list (see `make_customnode_list_entry`)
+getlist_response_cache = {}
+
+
+def make_cached_json_response(request, etag, body, gzipped_body):
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+
+    if etag in request.headers.get('If-None-Match', ''):
+        return web.Response(status=304, headers=headers)
+
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        body = gzipped_body
+
+    return web.Response(body=body, content_type='application/json', headers=headers)
+
+
+async def build_customnode_list(channel, mode, skip_update, force=False):
+    node_packs = await core.get_unified_total_nodes(channel, mode, 'cache')
+    json_obj_github = core.get_data_by_mode(mode, 'github-stats.json', 'default')
+    json_obj_extras = core.get_data_by_mode(mode, 'extras.json', 'default')
+
+    core.populate_github_stats(node_packs, await json_obj_github)
+    core.populate_favorites(node_packs, await json_obj_extras)
+
+    await check_state_of_git_node_pack(node_packs, not skip_update, do_update_check=not skip_update, force=force)
+
+    for v in node_packs.values():
+        populate_markdown(v)
+
+    if channel != 'local':
+        found = 'custom'
+
+        for name, url in core.get_channel_dict().items():
+            if url == channel:
+                found = name
+                break
+
+        channel = found
+
+    return dict(channel=channel, node_packs=node_packs)
+
+
+def make_customnode_list_entry(generation, result):
+    body = json.dumps(result).encode('utf-8')
+
+    return {
+        'generation': generation,
+        'result': result,
+        'etag': f'"{hashlib.sha1(body).hexdigest()}"',
+        'body': body,
+        'gzipped_body': gzip.compress(body, compresslevel=6),
+        'query_index': None,    # built on the first `/customnode/query`
+    }
+
+
+async def get_customnode_list_entry(channel, mode):
+    """
+    The list without the update check depends only on the installed packs and the DB documents,
+    so it is reused while their generation is unchanged. (In the remote mode, computing the generation revalidates the DB documents.)
+    """
+    generation = await core.get_catalog_generation(channel, mode)
+
+    entry = getlist_response_cache.get((channel, mode))
+    if entry is None or entry['generation'] != generation:
+        entry = make_customnode_list_entry(generation, await build_customnode_list(channel, mode, True))
+        getlist_response_cache[(channel, mode)] = entry
+
+    return entry
+
+
 @routes.get("/customnode/getlist")
 async def fetch_customnode_list(request):
     """
@@ -843,31 +1012,169 @@ async def fetch_customnode_list(request):
     else:
         channel = core.get_config()['channel_url']
 
-    node_packs = await core.get_unified_total_nodes(channel, request.rel_url.query["mode"], 'cache')
-    json_obj_github = core.get_data_by_mode(request.rel_url.query["mode"], 'github-stats.json', 'default')
-    json_obj_extras = core.get_data_by_mode(request.rel_url.query["mode"], 'extras.json', 'default')
+    if skip_update:
+        entry = await get_customnode_list_entry(channel, request.rel_url.query["mode"])
+        return make_cached_json_response(request, entry['etag'], entry['body'], entry['gzipped_body'])
 
-    core.populate_github_stats(node_packs, await json_obj_github)
-    core.populate_favorites(node_packs, await json_obj_extras)
+    force = request.rel_url.query.get("force", '').lower() == "true"
+    result = await build_customnode_list(channel, request.rel_url.query["mode"], skip_update, force)
 
-    check_state_of_git_node_pack(node_packs, not skip_update, do_update_check=not skip_update)
+    return web.json_response(result, content_type='application/json')
 
-    for v in node_packs.values():
-        populate_markdown(v)
 
-    if channel != 'local':
-        found = 'custom'
+customnode_query_sort_keys = {
+    # sort key -> (key function, default order)
+    'stars': (lambda k, v: v['stars'] if isinstance(v.get('stars'), int) else -1, 'desc'),
+    'last_update': (lambda k, v: v.get('last_update') if isinstance(v.get('last_update'), str) else '', 'desc'),
+    'title': (lambda k, v: str(v.get('title') or k).lower(), 'asc'),
+}
 
-        for name, url in core.get_channel_dict().items():
-            if url == channel:
-                found = name
-                break
 
-        channel = found
+def build_customnode_query_index(node_packs):
+    """
+    Indexes over the finished list for `/customnode/query`. Built once per list generation.
+    """
+    by_state = {}
+    by_author = {}
+    updatable = set()
+    search_text = {}
 
-    result = dict(channel=channel, node_packs=node_packs)
+    for k, v in node_packs.items():
+        by_state.setdefault(v.get('state'), set()).add(k)
+        by_author.setdefault(str(v.get('author', '')).lower(), set()).add(k)
 
-    return web.json_response(result, content_type='application/json')
+        if v.get('update-state') == 'true' or v.get('updatable') is True:
+            updatable.add(k)
+
+        search_text[k] = '\n'.join(str(v.get(x, '')) for x in ('title', 'author', 'description', 'reference')).lower() + '\n' + k.lower()
+
+    orders = {}
+    for name, (key, _) in customnode_query_sort_keys.items():
+        orders[(name, 'asc')] = sorted(node_packs.keys(), key=lambda k: (key(k, node_packs[k]), k))
+        orders[(name, 'desc')] = orders[(name, 'asc')][::-1]
+
+    installed = by_state.get('enabled', set()) | by_state.get('disabled', set())
+
+    return {'by_state': by_state, 'by_author': by_author, 'updatable': updatable, 'installed': installed,
+            'search_text': search_text, 'orders': orders}
+
+
+def get_cached_git_updatable(node_packs):
+    """
+    The list for `/customnode/query` is built without the update check, so it has the update state of CNR packs only.
+    The state of git node packs is taken from the update check cache, which is kept fresh by the update checks of the UI.
+
+    :return: ids of the git node packs known to be updatable
+    """
+    res = set()
+    for k, v in node_packs.items():
+        if v.get('active_version') in ['unknown', 'nightly']:
+            dir_path = core.get_git_node_pack_path(v)
+            if dir_path and os.path.exists(dir_path) and core.get_cached_update_state(dir_path):
+                res.add(k)
+
+    return res
+
+
+def parse_bool_param(value):
+    if value is None:
+        return None
+
+    value = value.lower()
+    if value not in ['true', 'false']:
+        raise ValueError(f"invalid boolean: {value}")
+
+    return value == 'true'
+
+
+@routes.get("/customnode/query")
+async def query_customnode_list(request):
+    """
+    Filtered, sorted and paginated view of the unified custom node list.
+    """
+    query = request.rel_url.query
+
+    try:
+        mode = query.get('mode', 'cache')
+        states = [x for x in query.get('state', '').split(',') if x]
+        installed = parse_bool_param(query.get('installed'))
+        updatable = parse_bool_param(query.get('updatable'))
+        author = query.get('author')
+        text = query.get('q', '').strip().lower()
+
+        sort = query.get('sort', 'stars')
+        if sort not in customnode_query_sort_keys:
+            raise ValueError(f"invalid sort key: {sort}")
+
+        order = query.get('order', customnode_query_sort_keys[sort][1])
+        if order not in ['asc', 'desc']:
+            raise ValueError(f"invalid order: {order}")
+
+        limit = min(max(int(query.get('limit', 50)), 1), 500)
+
+        # cursor: <offset>.<version of the list>
+        offset, _, cursor_version = query.get('cursor', '0').partition('.')
+        offset = int(offset)
+        if offset < 0:
+            raise ValueError(f"invalid cursor: {offset}")
+    except ValueError as e:
+        return web.Response(status=400, text=str(e))
+
+    channel = 'local' if mode == 'local' else core.get_config()['channel_url']
+    entry = await get_customnode_list_entry(channel, mode)
+
+    if cursor_version and cursor_version != entry['etag'][1:13]:
+        return web.Response(status=409, text="The custom node list has changed. Restart from the first page.")
+
+    if entry['query_index'] is None:
+        entry['query_index'] = build_customnode_query_index(entry['result']['node_packs'])
+
+    index = entry['query_index']
+    node_packs = entry['result']['node_packs']
+
+    git_updatable = get_cached_git_updatable(node_packs)
+    all_updatable = index['updatable'] | git_updatable
+
+    # narrow down with the indexes first, then check the remaining conditions
+    candidates = None
+
+    def narrow(ids):
+        nonlocal candidates
+        candidates = set(ids) if candidates is None else candidates & ids
+
+    if states:
+        narrow(set().union(*(index['by_state'].get(x, set()) for x in states)))
+
+    if author is not None:
+        narrow(index['by_author'].get(author.lower(), set()))
+
+    if installed is True:
+        narrow(index['installed'])
+
+    if updatable is True:
+        narrow(all_updatable)
+
+    items = []
+    total = 0
+    for k in index['orders'][(sort, order)]:
+        if candidates is not None and k not in candidates:
+            continue
+        if installed is False and k in index['installed']:
+            continue
+        if updatable is False and k in all_updatable:
+            continue
+        if text and text not in index['search_text'][k]:
+            continue
+
+        if offset <= total < offset + limit:
+            items.append(dict(node_packs[k], key=k, **({'update-state': 'true'} if k in git_updatable else {})))
+
+        total += 1
+
+    next_cursor = f"{offset + limit}.{entry['etag'][1:13]}" if offset + limit < total else None
+
+    res = dict(channel=entry['result']['channel'], total=total, items=items, next_cursor=next_cursor)
+    return web.json_response(res, content_type='application/json')
 
 
 @routes.get("/customnode/alternatives")
@@ -877,6 +1184,7 @@ async def fetch_customnode_alternatives(request):
     res = {}
 
     for item in alter_json['items']:
+        item = dict(item)
         populate_markdown(item)
         res[item['id']] = item
 
@@ -945,6 +1253,7 @@ def check_model_installed(json_obj):
 async def fetch_externalmodel_list(request):
     # The model list is only allowed in the default channel, yet.
     json_obj = await core.get_data_by_mode(request.rel_url.query["mode"], 'model-list.json')
+    json_obj = dict(json_obj, models=[dict(x) for x in json_obj['models']])
 
     check_model_installed(json_obj)
 
@@ -1197,6 +1506,22 @@ async def queue_count(request):
         'is_processing': is_processing})
 
 
+@routes.get("/manager/cache/stats")
+async def cache_stats(request):
+    return web.json_response({'documents': manager_util.get_parsed_cache_stats(),
+                              'fetches': manager_util.get_fetch_stats()})
+
+
+@routes.post("/manager/cache/invalidate")
+async def cache_invalidate(request):
+    if not is_allowed_security_level('middle'):
+        logging.error(SECURITY_MESSAGE_MIDDLE_OR_BELOW)
+        return web.Response(status=403)
+
+    manager_util.invalidate_parsed_cache()
+    return web.Response(status=200)
+
+
 @routes.post("/manager/queue/install")
 async def install_custom_node(request):
     if not is_allowed_security_level('middle'):
@@ -1729,15 +2054,10 @@ async def default_cache_update():
             else:
                 uri = f"{core.DEFAULT_CHANNEL}/{filename}"
 
-            cache_uri = str(manager_util.simple_hash(uri)) + '_' + filename
+            cache_uri = str(manager_util.simple_hash(uri)) + '_' + os.path.splitext(filename)[0] + manager_util.get_cache_ext()
             cache_uri = os.path.join(manager_util.cache_dir, cache_uri)
 
-            json_obj = await manager_util.get_data(uri, True)
-
-            with manager_util.cache_lock:
-                with open(cache_uri, "w", encoding='utf-8') as file:
-                    json.dump(json_obj, file, indent=4, sort_keys=True)
-                    pass
+            await manager_util.fetch_to_cache(uri, cache_uri, silent=True)
         except Exception as e:
             logging.error(f"[ComfyUI-Manager] Failed to perform initial fetching '{filename}': {e}")
             traceback.print_exc()
@@ -5,12 +5,23 @@ description:
 import traceback
 
 import aiohttp
+import asyncio
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import gzip
 import json
+import struct
+import zlib
 import threading
 import os
 from datetime import datetime
 import subprocess
 import sys
+import tempfile
+import time
 import re
 import logging
 import platform
@@ -18,13 +29,18 @@ import shlex
 import cm_global
 
 
-cache_lock = threading.Lock()
-
 comfyui_manager_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-cache_dir = os.path.join(comfyui_manager_path, '.cache')  # This path is also updated together in **manager_core.update_user_directory**.
+# This path is replaced by **manager_core.update_user_directory** (`<user dir>/default/ComfyUI-Manager/cache`), and then,
+# if `shared_cache_dir` is set in config.ini, by **manager_core.apply_shared_cache_dir** on the first `get_config()`.
+# The same applies to cm-cli, whose `--user-directory` is applied before the config is read.
+cache_dir = os.path.join(comfyui_manager_path, '.cache')
 
 use_uv = False
 
+# These are updated by **manager_core.read_config**.
+cache_ttl = 86400               # seconds until a cached DB file needs to be revalidated
+cache_max_stale_age = 604800    # seconds after the TTL during which a stale cache is served while revalidating
+
 
 def add_python_path_to_env():
     if platform.system() != "Windows":
@@ -63,17 +79,10 @@ class StrictVersion:
         self.parse_version_string()
 
     def parse_version_string(self):
-        parts = self.version_string.split('.')
-        if not parts:
-            raise ValueError("Version string must not be empty")
-
-        self.major = int(parts[0])
-        self.minor = int(parts[1]) if len(parts) > 1 else 0
-        self.patch = int(parts[2]) if len(parts) > 2 else 0
+        self.major, self.minor, self.patch, self.pre_release = parse_strict_version(self.version_string)
 
-        # Handling pre-release versions if present
-        if len(parts) > 3:
-            self.pre_release = parts[3]
+        # compact comparison key: a release is greater than any of its pre-releases
+        self.key = self.major, self.minor, self.patch, (1, '') if self.pre_release is None else (0, self.pre_release)
 
     def __str__(self):
         version = f"{self.major}.{self.minor}.{self.patch}"
@@ -81,36 +90,67 @@ class StrictVersion:
             version += f"-{self.pre_release}"
         return version
 
+    def __hash__(self):
+        return hash(self.key)
+
     def __eq__(self, other):
-        return (self.major, self.minor, self.patch, self.pre_release) == \
-            (other.major, other.minor, other.patch, other.pre_release)
+        return self.key == other.key
 
     def __lt__(self, other):
-        if (self.major, self.minor, self.patch) == (other.major, other.minor, other.patch):
-            return self.pre_release_compare(self.pre_release, other.pre_release) < 0
-        return (self.major, self.minor, self.patch) < (other.major, other.minor, other.patch)
-
-    @staticmethod
-    def pre_release_compare(pre1, pre2):
-        if pre1 == pre2:
-            return 0
-        if pre1 is None:
-            return 1
-        if pre2 is None:
-            return -1
-        return -1 if pre1 < pre2 else 1
+        return self.key < other.key
 
     def __le__(self, other):
-        return self == other or self < other
+        return self.key <= other.key
 
     def __gt__(self, other):
-        return not self <= other
+        return self.key > other.key
 
     def __ge__(self, other):
-        return not self < other
+        return self.key >= other.key
 
     def __ne__(self, other):
-        return not self == other
+        return self.key != other.key
+
+
+#
+# Version strings are parsed repeatedly in hot loops (getlist, requirement checks), so parsed versions are memoized.
+# Parsed objects are shared and must not be modified.
+#
+version_cache_size = 4096
+
+
+@functools.lru_cache(maxsize=version_cache_size)
+def parse_strict_version(version_string):
+    parts = version_string.split('.')
+    if not parts:
+        raise ValueError("Version string must not be empty")
+
+    major = int(parts[0])
+    minor = int(parts[1]) if len(parts) > 1 else 0
+    patch = int(parts[2]) if len(parts) > 2 else 0
+
+    # Handling pre-release versions if present
+    pre_release = parts[3] if len(parts) > 3 else None
+
+    return major, minor, patch, pre_release
+
+
+@functools.lru_cache(maxsize=version_cache_size)
+def get_strict_version(version_string) -> StrictVersion:
+    return StrictVersion(version_string)
+
+
+@functools.lru_cache(maxsize=version_cache_size)
+def get_pep440_version(version_string):
+    """
+    PEP 440 version of `version_string`, or 0.0.0 if it cannot be parsed
+    """
+    from packaging import version
+
+    try:
+        return version.parse(version_string)
+    except:
+        return version.parse("0.0.0")
 
 
 def simple_hash(input_string):
@@ -132,26 +172,532 @@ def is_file_created_within_one_day(file_path):
     return time_difference <= 86400
 
 
+def get_cache_validated_time(cache_path):
+    """
+    When the content of `cache_path` was last known to be current: the later of its mtime and of the last
+    `304 Not Modified` revalidation, which is recorded in the `.meta` sidecar instead of touching the cache file,
+    so that the file signature (see `load_document`) only changes with the content.
+
+    :raises OSError: if `cache_path` doesn't exist
+    """
+    mtime = os.path.getmtime(cache_path)
+    validated_at = read_cache_validators(cache_path).get('validated_at')
+
+    if isinstance(validated_at, (int, float)):
+        return max(mtime, validated_at)
+
+    return mtime
+
+
+def get_cache_freshness(cache_path):
+    """
+    :return: 'fresh', 'stale' (servable while being revalidated in background), 'expired' or 'not-cached'
+    """
+    try:
+        age = datetime.now().timestamp() - get_cache_validated_time(cache_path)
+    except OSError:
+        return 'not-cached'
+
+    if age <= cache_ttl:
+        return 'fresh'
+    elif age <= cache_ttl + cache_max_stale_age:
+        return 'stale'
+
+    return 'expired'
+
+
+#
+# Cache file format
+#
+# A cache file consists of a 10 bytes header followed by the encoded payload:
+#     magic(4) = b'CMC\x00' | format version(1) | codec id(1) | crc32 of payload(4, big endian)
+#
+# Files without the magic are read as plain JSON, so the cache files written by older versions remain valid.
+# The `json` codec writes plain JSON without the header, so older versions can read it too.
+# Each codec writes to its own file extension (see `get_cache_ext`), so older versions never pick up a binary cache file.
+#
+CACHE_MAGIC = b'CMC\x00'
+CACHE_FORMAT_VERSION = 1
+CACHE_HEADER = struct.Struct('>4sBBI')
+
+cache_codec = 'auto'  # auto | json | gzip | zstd | msgpack (This is updated by **manager_core.read_config**.)
+
+cache_codecs = {}       # name -> (codec id, dumps, loads, expansion)
+cache_codec_ids = {}    # codec id -> name
+
+
+def register_cache_codec(name, codec_id, dumps, loads, expansion=1):
+    """
+    :param dumps: obj -> bytes
+    :param loads: bytes -> obj
+    :param expansion: approximate ratio of the JSON size to the encoded size (used for the memory budget)
+    """
+    cache_codecs[name] = (codec_id, dumps, loads, expansion)
+    cache_codec_ids[codec_id] = name
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _json_loads(data):
+    return json.loads(data.decode('utf-8', errors='ignore'))
+
+
+register_cache_codec('json', 1, _json_dumps, _json_loads)
+register_cache_codec('gzip', 2, lambda obj: gzip.compress(_json_dumps(obj), compresslevel=6), lambda data: _json_loads(gzip.decompress(data)), expansion=5)
+
+try:
+    import zstandard
+    register_cache_codec('zstd', 3,
+                         lambda obj: zstandard.ZstdCompressor(level=3).compress(_json_dumps(obj)),
+                         lambda data: _json_loads(zstandard.ZstdDecompressor().decompressobj().decompress(data)), expansion=5)  # NOTE: streamed frames have no content size
+except ImportError:
+    pass
+
+try:
+    import msgpack
+    register_cache_codec('msgpack', 4,
+                         lambda obj: msgpack.packb(obj, use_bin_type=True),
+                         lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False))
+except ImportError:
+    pass
+
+
+try:
+    import ijson  # optional: incremental parsing keeps only the object graph in memory
+except ImportError:
+    ijson = None
+
+
+class _IdentityCompressor:
+    def compress(self, data):
+        return data
+
+    def flush(self):
+        return b''
+
+
+# name -> (compressor factory, reader factory) of the codecs which can be written/read as a stream
+cache_stream_codecs = {
+    'json': (_IdentityCompressor, lambda f: f),
+    'gzip': (lambda: zlib.compressobj(6, zlib.DEFLATED, 31), lambda f: gzip.GzipFile(fileobj=f, mode='rb')),
+}
+
+if 'zstd' in cache_codecs:
+    cache_stream_codecs['zstd'] = (lambda: zstandard.ZstdCompressor(level=3).compressobj(),
+                                   lambda f: zstandard.ZstdDecompressor().stream_reader(f))
+
+
+def get_cache_codec():
+    if cache_codec in cache_codecs:
+        return cache_codec
+
+    if cache_codec != 'auto':
+        logging.warning(f"[ComfyUI-Manager] The cache codec '{cache_codec}' is not available. Falling back to 'auto'.")
+
+    # NOTE: gzip saves space but loads slower than plain JSON, so it is never picked automatically
+    for codec in ('zstd', 'msgpack'):
+        if codec in cache_codecs:
+            return codec
+
+    return 'json'
+
+
+def get_cache_ext(codec=None):
+    """
+    file extension of the cache files written with `codec` (default: the configured codec)
+    """
+    return '.' + (codec or get_cache_codec())
+
+
+def encode_cache(obj, codec=None):
+    codec = codec or get_cache_codec()
+    codec_id, dumps, _, _ = cache_codecs[codec]
+    payload = dumps(obj)
+
+    if codec == 'json':
+        return payload
+
+    return CACHE_HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, codec_id, zlib.crc32(payload)) + payload
+
+
+def decode_cache(data):
+    if not data.startswith(CACHE_MAGIC):
+        # legacy: plain json
+        return _json_loads(data)
+
+    _, version, codec_id, checksum = CACHE_HEADER.unpack_from(data)
+    payload = data[CACHE_HEADER.size:]
+
+    if version > CACHE_FORMAT_VERSION:
+        raise ValueError(f"unsupported cache format version: {version}")
+
+    if codec_id not in cache_codec_ids:
+        raise ValueError(f"unsupported cache codec: {codec_id}")
+
+    if zlib.crc32(payload) != checksum:
+        raise ValueError("cache checksum mismatch")
+
+    return cache_codecs[cache_codec_ids[codec_id]][2](payload)
+
+
+def get_cache_cost(data):
+    """
+    approximate size of `data` as JSON text
+    """
+    if data.startswith(CACHE_MAGIC) and data[5] in cache_codec_ids:
+        return len(data) * cache_codecs[cache_codec_ids[data[5]]][3]
+
+    return len(data)
+
+
+def get_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+umask = get_umask()  # NOTE: read once at import, since changing the umask is not thread-safe
+
+
+def atomic_write(path, data):
+    """
+    Write `data` to a temp file in the same directory and rename it over `path`.
+    Readers, including other processes, see either the old or the new file, never a partially written one.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+
+        # mkstemp creates the file with 0600, but the result should have the usual permissions (e.g. `shared_cache_dir`)
+        os.chmod(temp_path, 0o666 & ~umask)
+
+        for i in range(10):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                # Windows: the target can be briefly locked by a reader
+                if i == 9:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_cache_file(path, obj):
+    atomic_write(path, encode_cache(obj))
+    bump_document_generation()
+
+
+def read_cache_file(path):
+    with open(path, "rb") as file:
+        data = file.read()
+
+    return decode_cache(data)
+
+
+class _CRC32Reader:
+    def __init__(self, f):
+        self.f = f
+        self.crc = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.crc = zlib.crc32(data, self.crc)
+        return data
+
+
+def parse_json_stream(f):
+    """
+    Parse a JSON document from a binary stream.
+    """
+    if ijson is not None:
+        return next(ijson.items(f, '', use_float=True))
+
+    return _json_loads(f.read())
+
+
+def stream_read_cache_file(path):
+    """
+    Same as `read_cache_file`, but decompresses and parses incrementally instead of loading the whole file first.
+    """
+    with open(path, "rb") as f:
+        header = f.read(CACHE_HEADER.size)
+
+        if not header.startswith(CACHE_MAGIC):
+            f.seek(0)
+            return parse_json_stream(f)
+
+        _, version, codec_id, checksum = CACHE_HEADER.unpack(header)
+        codec = cache_codec_ids.get(codec_id)
+
+        if version > CACHE_FORMAT_VERSION or codec not in cache_stream_codecs:
+            f.seek(0)
+            return decode_cache(f.read())
+
+        payload = _CRC32Reader(f)
+        obj = parse_json_stream(cache_stream_codecs[codec][1](payload))
+
+        # consume the rest of the payload for the checksum (e.g. trailing whitespace)
+        while payload.read(65536):
+            pass
+
+        if payload.crc != checksum:
+            raise ValueError("cache checksum mismatch")
+
+        return obj
+
+
+#
+# In-memory cache of parsed DB documents
+#
+# Parsed documents are kept in a process-wide LRU keyed by (channel, filename, mode).
+# An entry is valid only while the (mtime, size) of its backing file is unchanged.
+#
+parsed_cache = collections.OrderedDict()  # key -> (path, (mtime_ns, size), cost, obj)
+parsed_cache_budget = 128 * 1024 * 1024  # bytes of JSON text (This is updated by **manager_core.read_config**.)
+parsed_cache_cost = 0
+parsed_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+parsed_cache_lock = threading.Lock()
+document_generation = 0  # increased whenever a DB document may have changed, so that data derived from it can be invalidated
+document_signatures = {}  # key -> (path, (mtime_ns, size)) of the last loaded document, kept even if it is evicted
+
+
+def bump_document_generation():
+    global document_generation
+    document_generation += 1
+
+
+def get_file_signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _drop_parsed_cache_entry(key):
+    global parsed_cache_cost
+
+    item = parsed_cache.pop(key, None)
+    if item is not None:
+        parsed_cache_cost -= item[2]
+
+
+def put_parsed_cache(key, path, obj, cost, signature=None):
+    """
+    :param cost: approximate size of the document as JSON text, used for the memory budget
+    """
+    global parsed_cache_cost
+
+    signature = signature or get_file_signature(path)
+    if signature is None or cost > parsed_cache_budget:
+        return
+
+    with parsed_cache_lock:
+        _drop_parsed_cache_entry(key)
+        parsed_cache[key] = path, signature, cost, obj
+        parsed_cache_cost += cost
+
+        while parsed_cache_cost > parsed_cache_budget:
+            _drop_parsed_cache_entry(next(iter(parsed_cache)))
+            parsed_cache_stats['evictions'] += 1
+
+
+def load_document(key, path):
+    """
+    Load the DB document at `path` through the parsed-object cache.
+
+    NOTE: The returned object is shared. Callers that modify it must copy it first.
+    """
+    signature = get_file_signature(path)
+
+    with parsed_cache_lock:
+        item = parsed_cache.get(key)
+        if item is not None:
+            if item[0] == path and item[1] == signature:
+                parsed_cache.move_to_end(key)
+                parsed_cache_stats['hits'] += 1
+                return item[3]
+
+            _drop_parsed_cache_entry(key)
+            parsed_cache_stats['invalidations'] += 1
+
+        parsed_cache_stats['misses'] += 1
+
+    with open(path, "rb") as f:
+        # the signature of the opened file, in case it has just been replaced
+        st = os.fstat(f.fileno())
+        signature = st.st_mtime_ns, st.st_size
+        data = f.read()
+
+    obj = decode_cache(data)
+    put_parsed_cache(key, path, obj, get_cache_cost(data), signature)
+
+    # a document that is parsed again only because it was evicted (or invalidated) has not changed
+    with parsed_cache_lock:
+        is_changed = document_signatures.get(key) != (path, signature)
+        document_signatures[key] = path, signature
+
+    if is_changed:
+        bump_document_generation()
+
+    return obj
+
+
+def invalidate_parsed_cache(key=None):
+    with parsed_cache_lock:
+        if key is None:
+            parsed_cache_stats['invalidations'] += len(parsed_cache)
+            parsed_cache.clear()
+            globals()['parsed_cache_cost'] = 0
+        elif key in parsed_cache:
+            _drop_parsed_cache_entry(key)
+            parsed_cache_stats['invalidations'] += 1
+
+    bump_document_generation()
+
+
+def get_parsed_cache_stats():
+    with parsed_cache_lock:
+        return dict(parsed_cache_stats, entries=len(parsed_cache), cost=parsed_cache_cost, budget=parsed_cache_budget)
+
+
+#
+# Shared HTTP client
+#
+# All the requests of ComfyUI-Manager are performed on a dedicated event loop with one pooled `aiohttp.ClientSession`,
+# so keep-alive connections are reused across requests, even if the callers are running on different event loops
+# (e.g. the aiohttp server loop and the `asyncio.run` of background threads).
+#
+http_loop = None
+http_session = None
+http_lock = threading.Lock()
+
+
+def get_http_loop():
+    global http_loop
+
+    with http_lock:
+        if http_loop is None:
+            http_loop = asyncio.new_event_loop()
+            threading.Thread(target=http_loop.run_forever, name='ComfyUI-Manager-HTTP', daemon=True).start()
+            atexit.register(close_http_session)
+
+    return http_loop
+
+
+async def get_http_session():
+    """
+    Must be called in the `http_loop`.
+    """
+    global http_session
+
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(verify_ssl=False, limit=16, keepalive_timeout=60)
+        http_session = aiohttp.ClientSession(trust_env=True, connector=connector)
+
+    return http_session
+
+
+def close_http_session():
+    if http_session is not None and not http_session.closed:
+        try:
+            asyncio.run_coroutine_threadsafe(http_session.close(), http_loop).result(timeout=3)
+        except Exception:
+            pass
+
+
+def run_in_http_loop(coro):
+    """
+    Run `coro` on the shared HTTP loop and return an awaitable for the caller's loop.
+    """
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_http_loop()))
+
+
+async def _http_get(uri, headers, raise_for_status=True):
+    session = await get_http_session()
+    async with session.get(uri, headers=headers) as resp:
+        validators = {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified')}
+
+        if resp.status == 304:
+            return 304, None, validators
+
+        if raise_for_status:
+            resp.raise_for_status()
+
+        return resp.status, await resp.text(), validators
+
+
+async def _http_download_to_cache(uri, headers, cache_path, codec):
+    """
+    Stream the response body of `uri` into a temp file next to `cache_path`, encoding it in the cache format on the fly.
+
+    :return: (status, temp file path or None if not modified, validators)
+    """
+    session = await get_http_session()
+    async with session.get(uri, headers=headers) as resp:
+        validators = {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified')}
+
+        if resp.status == 304:
+            return 304, None, validators
+
+        resp.raise_for_status()
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', prefix='.' + os.path.basename(cache_path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if codec != 'json':
+                    f.write(b'\0' * CACHE_HEADER.size)
+
+                compressor = cache_stream_codecs[codec][0]()
+                crc = 0
+                async for chunk in resp.content.iter_chunked(65536):
+                    data = compressor.compress(chunk)
+                    crc = zlib.crc32(data, crc)
+                    f.write(data)
+
+                data = compressor.flush()
+                crc = zlib.crc32(data, crc)
+                f.write(data)
+
+                if codec != 'json':
+                    f.seek(0)
+                    f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, cache_codecs[codec][0], crc))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        return resp.status, temp_path, validators
+
+
 async def get_data(uri, silent=False):
     if not silent:
         print(f"FETCH DATA from: {uri}", end="")
 
     if uri.startswith("http"):
-        async with aiohttp.ClientSession(trust_env=True, connector=aiohttp.TCPConnector(verify_ssl=False)) as session:
-            headers = {
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache',
-                'Expires': '0'
-            }
-            async with session.get(uri, headers=headers) as resp:
-                json_text = await resp.text()
+        headers = {
+            'Cache-Control': 'no-cache',
+            'Pragma': 'no-cache',
+            'Expires': '0'
+        }
+        _, json_text, _ = await run_in_http_loop(_http_get(uri, headers, raise_for_status=False))
     else:
-        with cache_lock:
-            with open(uri, "r", encoding="utf-8") as f:
-                json_text = f.read()
+        with open(uri, "rb") as f:
+            json_text = f.read()
 
     try:
-        json_obj = json.loads(json_text)
+        json_obj = decode_cache(json_text) if isinstance(json_text, bytes) else json.loads(json_text)
     except Exception as e:
         logging.error(f"[ComfyUI-Manager] An error occurred while fetching '{uri}': {e}")
 
@@ -163,9 +709,34 @@ async def get_data(uri, silent=False):
     return json_obj
 
 
+async def get_data_conditional(uri, etag=None, last_modified=None):
+    """
+    GET `uri` as a conditional request.
+
+    :return: (status, json object or None if not modified, validators of the response)
+    """
+    headers = {
+        'Cache-Control': 'no-cache',
+        'Pragma': 'no-cache',
+        'Expires': '0'
+    }
+
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    status, json_text, validators = await run_in_http_loop(_http_get(uri, headers))
+
+    if status == 304:
+        return 304, None, validators
+
+    return status, json.loads(json_text), validators
+
+
 def get_cache_path(uri):
     cache_uri = str(simple_hash(uri)) + '_' + os.path.basename(uri).replace('&', "_").replace('?', "_").replace('=', "_")
-    return os.path.join(cache_dir, cache_uri+'.json')
+    return os.path.join(cache_dir, cache_uri+get_cache_ext())
 
 
 def get_cache_state(uri):
@@ -173,47 +744,311 @@ def get_cache_state(uri):
 
     if not os.path.exists(cache_uri):
         return "not-cached"
-    elif is_file_created_within_one_day(cache_uri):
+    elif get_cache_freshness(cache_uri) == 'fresh':
         return "cached"
 
     return "expired"
 
 
 def save_to_cache(uri, json_obj, silent=False):
-    cache_uri = get_cache_path(uri)
+    write_cache_file(get_cache_path(uri), json_obj)
+
+    if not silent:
+        logging.info(f"[ComfyUI-Manager] default cache updated: {uri}")
+
+
+def read_cache_validators(cache_path):
+    """
+    ETag/Last-Modified of the response stored in `cache_path`, and `validated_at` (time of the last revalidation)
+    """
+    meta_path = cache_path + '.meta'
+
+    if not os.path.exists(cache_path) or not os.path.exists(meta_path):
+        return {}
+
+    try:
+        with open(meta_path, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_cache_validators(cache_path, validators):
+    try:
+        atomic_write(cache_path + '.meta', json.dumps(validators))
+    except Exception as e:
+        logging.warning(f"[ComfyUI-Manager] Failed to write cache validators of '{cache_path}': {e}")
+
+
+#
+# Cross-process refresh election
+#
+# Several ComfyUI instances may share one cache directory (see `shared_cache_dir` in config.ini).
+# The refresh of each cache entry is guarded by an OS file lock on `<cache file>.lock`; the process that gets the lock
+# refreshes the entry, and the others wait for it and then reuse the refreshed file.
+#
+refresh_lock_timeout = 300
 
-    with cache_lock:
-        with open(cache_uri, "w", encoding='utf-8') as file:
-            json.dump(json_obj, file, indent=4, sort_keys=True)
-            if not silent:
-                logging.info(f"[ComfyUI-Manager] default cache updated: {uri}")
+
+def try_lock_file(path):
+    """
+    Non-blocking exclusive lock on `path`.
+
+    :return: lock handle, None if the lock is held by another process, or False if the lock file is not available
+    """
+    try:
+        f = open(path, 'a+b')
+    except OSError:
+        # e.g. read-only cache dir: proceed without cross-process locking
+        return False
+
+    try:
+        if platform.system() == "Windows":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+
+    return f
+
+
+def unlock_file(handle):
+    if not handle:
+        return
+
+    try:
+        if platform.system() == "Windows":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    finally:
+        handle.close()
+
+
+@contextlib.asynccontextmanager
+async def cache_refresh_lock(cache_path):
+    """
+    Elect one process to refresh `cache_path`.
+
+    Yields True if `cache_path` has been refreshed by another process in the meantime, in which case the caller should
+    read the cache instead of refreshing it.
+    """
+    start = time.time()
+    handle = try_lock_file(cache_path + '.lock')
+
+    while handle is None:
+        if time.time() - start > refresh_lock_timeout:
+            logging.warning(f"[ComfyUI-Manager] Timed out waiting for another process to refresh '{cache_path}'")
+            break
+
+        await asyncio.sleep(0.2)
+        handle = try_lock_file(cache_path + '.lock')
+
+    try:
+        try:
+            refreshed = get_cache_validated_time(cache_path) >= start
+        except OSError:
+            refreshed = False
+
+        yield refreshed
+    finally:
+        unlock_file(handle)
+
+
+#
+# Single-flight: concurrent fetches of the same uri share one in-flight download.
+# `concurrent.futures.Future` is used, so that callers on different event loops can await it.
+#
+inflight_fetches = {}   # (uri, cache_path) -> concurrent.futures.Future
+inflight_lock = threading.Lock()
+fetch_stats = {'fetches': 0, 'coalesced': 0, 'refreshed_by_other_process': 0, 'failures': 0}
+
+
+def get_fetch_stats():
+    with inflight_lock:
+        return dict(fetch_stats, in_flight=len(inflight_fetches))
+
+
+async def fetch_to_cache(uri, cache_path=None, silent=False):
+    """
+    Fetch `uri` into `cache_path` with a conditional request.
+
+    If the server responds `304 Not Modified`, the lifetime of the cached entry is extended instead of re-downloading.
+    If a fetch of the same `uri` is already in progress, its result is shared instead of fetching again.
+
+    NOTE: The returned object may be shared by concurrent callers. Do not modify it in place.
+    """
+    if cache_path is None:
+        cache_path = get_cache_path(uri)
+
+    key = uri, cache_path
+
+    with inflight_lock:
+        future = inflight_fetches.get(key)
+        is_leader = future is None
+
+        if is_leader:
+            future = inflight_fetches[key] = concurrent.futures.Future()
+            fetch_stats['fetches'] += 1
+        else:
+            fetch_stats['coalesced'] += 1
+
+    if not is_leader:
+        return await asyncio.wrap_future(future)
+
+    try:
+        async with cache_refresh_lock(cache_path) as refreshed:
+            if refreshed:
+                with inflight_lock:
+                    fetch_stats['refreshed_by_other_process'] += 1
+
+                json_obj = read_cache_file(cache_path)
+            else:
+                json_obj = await _fetch_to_cache(uri, cache_path, silent)
+
+        future.set_result(json_obj)
+        return json_obj
+    except BaseException as e:
+        with inflight_lock:
+            fetch_stats['failures'] += 1
+
+        future.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            inflight_fetches.pop(key, None)
+
+
+async def _fetch_to_cache(uri, cache_path, silent):
+    codec = get_cache_codec()
+
+    if not uri.startswith("http"):
+        json_obj = await get_data(uri, silent=silent)
+        status, new_validators = 200, {}
+    else:
+        validators = read_cache_validators(cache_path)
+
+        if not silent:
+            print(f"FETCH DATA from: {uri}", end="")
+
+        if codec in cache_stream_codecs:
+            # stream the body into the cache format, and parse it from the file,
+            # instead of holding the raw body, the decoded text and the objects at the same time
+            headers = {
+                'Cache-Control': 'no-cache',
+                'Pragma': 'no-cache',
+                'Expires': '0'
+            }
+
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+            status, temp_path, new_validators = await run_in_http_loop(_http_download_to_cache(uri, headers, cache_path, codec))
+
+            if status != 304:
+                try:
+                    json_obj = stream_read_cache_file(temp_path)
+                    os.replace(temp_path, cache_path)
+                    bump_document_generation()
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+                write_cache_validators(cache_path, new_validators)
+
+                if not silent:
+                    print(" [DONE]")
+
+                return json_obj
+        else:
+            status, json_obj, new_validators = await get_data_conditional(uri, validators.get('etag'), validators.get('last_modified'))
+
+    if status == 304:
+        write_cache_validators(cache_path, dict(validators, **{k: v for k, v in new_validators.items() if v}, validated_at=time.time()))
+        json_obj = stream_read_cache_file(cache_path)
+
+        if not silent:
+            print(" [NOT MODIFIED]")
+
+        return json_obj
+
+    write_cache_file(cache_path, json_obj)
+    write_cache_validators(cache_path, new_validators)
+
+    if not silent and uri.startswith("http"):
+        print(" [DONE]")
+
+    return json_obj
+
+
+revalidating_uris = set()
+revalidating_lock = threading.Lock()
+
+
+def revalidate_in_background(uri, cache_path=None):
+    """
+    Refresh the cache of `uri` without waiting for it.
+    Only one refresh per uri runs at a time, on the shared HTTP loop.
+    """
+    with revalidating_lock:
+        if uri in revalidating_uris:
+            return False
+
+        revalidating_uris.add(uri)
+
+    async def revalidate():
+        try:
+            await fetch_to_cache(uri, cache_path, silent=True)
+            logging.info(f"[ComfyUI-Manager] stale cache revalidated: {uri}")
+        except Exception as e:
+            logging.warning(f"[ComfyUI-Manager] Failed to revalidate the stale cache of '{uri}': {e}")
+        finally:
+            with revalidating_lock:
+                revalidating_uris.discard(uri)
+
+    asyncio.run_coroutine_threadsafe(revalidate(), get_http_loop())
+    return True
 
 
 async def get_data_with_cache(uri, silent=False, cache_mode=True, dont_wait=False, dont_cache=False):
     cache_uri = get_cache_path(uri)
+    freshness = get_cache_freshness(cache_uri) if cache_mode else None
 
     if cache_mode and dont_wait:
         # NOTE: return the cache if possible, even if it is expired, so do not cache
-        if not os.path.exists(cache_uri):
+        if freshness == 'not-cached':
             logging.error(f"[ComfyUI-Manager] The network connection is unstable, so it is operating in fallback mode: {uri}")
 
             return {}
         else:
-            if not is_file_created_within_one_day(cache_uri):
+            if freshness == 'stale':
+                revalidate_in_background(uri, cache_uri)
+            elif freshness == 'expired':
                 logging.error(f"[ComfyUI-Manager] The network connection is unstable, so it is operating in outdated cache mode: {uri}")
 
             return await get_data(cache_uri, silent=silent)
 
-    if cache_mode and is_file_created_within_one_day(cache_uri):
+    if freshness == 'fresh':
         json_obj = await get_data(cache_uri, silent=silent)
-    else:
+    elif freshness == 'stale':
+        revalidate_in_background(uri, cache_uri)
+        json_obj = await get_data(cache_uri, silent=silent)
+    elif dont_cache:
         json_obj = await get_data(uri, silent=silent)
-        if not dont_cache:
-            with cache_lock:
-                with open(cache_uri, "w", encoding='utf-8') as file:
-                    json.dump(json_obj, file, indent=4, sort_keys=True)
-                    if not silent:
-                        logging.info(f"[ComfyUI-Manager] default cache updated: {uri}")
+    else:
+        json_obj = await fetch_to_cache(uri, cache_uri, silent=silent)
+        if not silent:
+            logging.info(f"[ComfyUI-Manager] default cache updated: {uri}")
 
     return json_obj
 
@@ -299,7 +1134,7 @@ def parse_requirement_line(line):
         res['operator'] = operator
 
     if version is not None:
-        res['version'] = StrictVersion(version)
+        res['version'] = get_strict_version(version)
 
     if index_url is not None:
         res['index_url'] = index_url
@@ -344,7 +1179,7 @@ class PIPFixer:
             logging.error(cmd)
             return
 
-        torch_ver = StrictVersion(spec[0])
+        torch_ver = get_strict_version(spec[0])
         torch_ver = f"{torch_ver.major}.{torch_ver.minor}.{torch_ver.patch}"
         torch_torchvision_torchaudio_ver = torch_torchvision_torchaudio_version_map.get(torch_ver)
 
@@ -394,20 +1229,20 @@ class PIPFixer:
             oph = new_pip_versions.get('opencv-python-headless')
 
             versions = [ocp, ocph, op, oph]
-            versions = [StrictVersion(x) for x in versions if x is not None]
+            versions = [get_strict_version(x) for x in versions if x is not None]
             versions.sort(reverse=True)
 
             if len(versions) > 0:
                 # upgrade to maximum version
                 targets = []
                 cur = versions[0]
-                if ocp is not None and StrictVersion(ocp) != cur:
+                if ocp is not None and get_strict_version(ocp) != cur:
                     targets.append('opencv-contrib-python')
-                if ocph is not None and StrictVersion(ocph) != cur:
+                if ocph is not None and get_strict_version(ocph) != cur:
                     targets.append('opencv-contrib-python-headless')
-                if op is not None and StrictVersion(op) != cur:
+                if op is not None and get_strict_version(op) != cur:
                     targets.append('opencv-python')
-                if oph is not None and StrictVersion(oph) != cur:
+                if oph is not None and get_strict_version(oph) != cur:
                     targets.append('opencv-python-headless')
 
                 if len(targets) > 0:
@@ -429,7 +1264,7 @@ class PIPFixer:
                 np = new_pip_versions.get('numpy')
                 if cm_global.pip_overrides.get('numpy') == 'numpy<2':
                     if np is not None:
-                        if StrictVersion(np) >= StrictVersion('2'):
+                        if get_strict_version(np) >= get_strict_version('2'):
                             cmd = make_pip_cmd(['install', "numpy<2"])
                             subprocess.check_output(cmd , universal_newlines=True)
 
@@ -476,7 +1311,7 @@ class PIPFixer:
                         normalized_name = parsed['package'].lower().replace('-', '_')
                         if normalized_name in new_pip_versions:
                             if 'version' in parsed and 'operator' in parsed:
-                                cur = StrictVersion(new_pip_versions[normalized_name])
+                                cur = get_strict_version(new_pip_versions[normalized_name])
                                 dest = parsed['version']
                                 op = parsed['operator']
                                 if cur == dest:
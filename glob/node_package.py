@@ -2,8 +2,34 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import os
+from typing import Optional
 
-from git_utils import get_commit_hash
+from git_utils import get_commit_hash, get_git_dirs
+
+
+# files that determine the identity (id, version, repository, commit) of a node package
+FINGERPRINT_FILES = ('', '.git', 'pyproject.toml', '.tracking')
+FINGERPRINT_GIT_FILES = (('gitdir', 'HEAD'), ('commondir', 'config'), ('commondir', os.path.join('refs', 'heads')), ('commondir', 'packed-refs'))
+
+
+def get_fingerprint(fullpath: str) -> tuple:
+    """Cheap signature of a node package directory. If it is unchanged, the package doesn't need to be resolved again."""
+    paths = [os.path.join(fullpath, x) for x in FINGERPRINT_FILES]
+
+    git_dirs = get_git_dirs(fullpath)
+    if git_dirs is not None:
+        gitdir, commondir = git_dirs
+        paths += [os.path.join(gitdir if base == 'gitdir' else commondir, x) for base, x in FINGERPRINT_GIT_FILES]
+
+    res = []
+    for x in paths:
+        try:
+            st = os.stat(x)
+            res.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            res.append(None)
+
+    return tuple(res)
 
 
 @dataclass
@@ -70,3 +96,40 @@ class InstalledNodePackage:
         return InstalledNodePackage(
             id=node_id, fullpath=fullpath, disabled=disabled, version=version
         )
+
+
+@dataclass(frozen=True)
+class NodePackEntry:
+    """An entry of `custom_nodes` or `custom_nodes/.disabled` found by the pack scanner."""
+
+    name: str
+    fullpath: str
+    is_dir: bool
+    in_disabled_dir: bool
+    fingerprint: Optional[tuple]
+
+    @property
+    def disabled(self) -> bool:
+        return self.in_disabled_dir or self.name.endswith('.disabled')
+
+
+@dataclass(frozen=True)
+class InstalledPacksSnapshot:
+    """
+    Immutable result of one scan of the custom node directories.
+
+    `generation` is increased only when the scanned entries or their fingerprints differ from the previous scan.
+    """
+
+    generation: int
+    timestamp: float
+    roots: tuple        # (path, mtime_ns) of the scanned directories
+    entries: tuple      # NodePackEntry: for each custom_nodes path, its entries and then the entries of its .disabled
+
+    @property
+    def dirs(self) -> tuple:
+        return tuple(x for x in self.entries if x.is_dir)
+
+    def get_reload_order(self) -> list:
+        # the enabled packs of every custom_nodes path first, then the disabled ones
+        return [x for x in self.dirs if not x.in_disabled_dir] + [x for x in self.dirs if x.in_disabled_dir]
@@ -15,6 +15,10 @@ import sys
 from urllib.parse import urlparse
 from github import Github
 
+# `glob` is not a package (and would clash with the stdlib `glob`), so the shared git helpers are imported by path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'glob'))
+import git_utils
+
 
 def download_url(url, dest_folder, filename=None):
     # Ensure the destination folder exists
@@ -52,6 +56,9 @@ if not os.path.exists(temp_dir):
 skip_update = '--skip-update' in sys.argv or '--skip-all' in sys.argv
 skip_stat_update = '--skip-stat-update' in sys.argv or '--skip-all' in sys.argv
 
+# only the latest sources are scanned, so the history is not needed: GIT_CLONE_STRATEGY=shallow|blobless|treeless
+clone_options = git_utils.clone_strategies.get(os.environ.get('GIT_CLONE_STRATEGY', 'full'), [])
+
 if not skip_stat_update:
     g = Github(os.environ.get('GITHUB_TOKEN'))
 else:
@@ -258,7 +265,7 @@ def clone_or_pull_git_repository(git_url):
             print(f"Pulling {repo_name} failed: {e}")
     else:
         try:
-            Repo.clone_from(git_url, repo_dir, recursive=True)
+            Repo.clone_from(git_url, repo_dir, recursive=True, multi_options=clone_options)
             print(f"Cloning {repo_name}...")
         except Exception as e:
             print(f"Cloning {repo_name} failed: {e}")
@@ -0,0 +1,56 @@
+"""
+Compare the load time and the disk size of the DB cache codecs (see `cache_codec` in config.ini)
+for the channel DB files bundled in the repository.
+
+usage: python scripts/bench-cache-codec.py [repeat]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+import manager_util  # noqa: E402
+
+
+FILES = ['custom-node-list.json', 'extension-node-map.json', 'model-list.json', 'github-stats.json']
+
+
+def measure(f, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best * 1000
+
+
+def main(repeat):
+    codecs = sorted(manager_util.cache_codecs, key=lambda x: manager_util.cache_codecs[x][0])
+    print(f"available codecs: {', '.join(codecs)} (auto: {manager_util.get_cache_codec()})")
+    print(f"best of {repeat} loads\n")
+
+    print(f"{'file':26}" + ''.join(f"{x:>20}" for x in ['legacy'] + codecs))
+
+    for filename in FILES:
+        with open(os.path.join(manager_util.comfyui_manager_path, filename), 'r', encoding='utf-8') as f:
+            obj = json.load(f)
+
+        # format of the cache files written by the previous versions
+        encoded = {'legacy': json.dumps(obj, indent=4, sort_keys=True).encode('utf-8')}
+        for codec in codecs:
+            encoded[codec] = manager_util.encode_cache(obj, codec)
+            assert manager_util.decode_cache(encoded[codec]) == obj
+
+        row = f"{filename:26}"
+        for name, data in encoded.items():
+            elapsed = measure(lambda: manager_util.decode_cache(data), repeat)
+            row += f"{len(data) // 1024:>9}KB {elapsed:>6.1f}ms"
+
+        print(row)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,101 @@
+"""
+Compare the `git_clone_strategy` options on a local fixture repository whose history carries large assets:
+clone time, disk usage, and switching to a commit pinned far back in the history (as a snapshot restore does).
+
+usage: python scripts/bench-clone-strategy.py [commits (default: 40)] [asset size in MB per commit (default: 1)]
+"""
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+
+import cm_global  # noqa: E402
+cm_global.pip_overrides = {}
+cm_global.pip_blacklist = set()
+cm_global.pip_downgrade_blacklist = []
+
+import manager_core as core  # noqa: E402
+import git_utils  # noqa: E402
+
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='bench', GIT_AUTHOR_EMAIL='bench@localhost',
+               GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='bench@localhost')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def make_fixture(base, commits, asset_size):
+    """
+    :return: clone url, commit hash pinned `commits * 3 / 4` commits back
+    """
+    work = os.path.join(base, 'work')
+    git('init', '-q', '-b', 'main', work)
+
+    hashes = []
+    for i in range(commits):
+        with open(os.path.join(work, 'nodes.py'), 'w') as f:
+            f.write(f'VERSION = {i}\n')
+        with open(os.path.join(work, 'asset.bin'), 'wb') as f:  # every revision of the asset stays in the history
+            f.write(os.urandom(asset_size))
+
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', f'commit {i}', cwd=work)
+        hashes.append(git('rev-parse', 'HEAD', cwd=work))
+
+    bare = os.path.join(base, 'remote.git')
+    git('clone', '-q', '--bare', work, bare)
+    git('config', 'uploadpack.allowFilter', 'true', cwd=bare)
+    git('config', 'uploadpack.allowAnySHA1InWant', 'true', cwd=bare)
+
+    return 'file://' + bare.replace(os.sep, '/'), hashes[-1 - commits * 3 // 4]
+
+
+def get_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for x in files:
+            total += os.lstat(os.path.join(root, x)).st_size
+
+    return total / 1024 / 1024
+
+
+def main(commits, asset_size):
+    with tempfile.TemporaryDirectory() as base:
+        core.update_user_directory(os.path.join(base, 'user'))
+
+        url, pinned = make_fixture(base, commits, asset_size * 1024 * 1024)
+        print(f"fixture: {commits} commits, {asset_size}MB asset per commit, pinned commit {commits * 3 // 4} commits back\n")
+
+        for strategy in git_utils.clone_strategies:
+            core.get_config()['git_clone_strategy'] = strategy
+            path = os.path.join(base, 'custom_nodes', f'pack-{strategy}')
+
+            with contextlib.redirect_stderr(io.StringIO()):  # clone progress
+                start = time.perf_counter()
+                core.clone_git_repo(url, path).close()
+                elapsed_clone = time.perf_counter() - start
+
+            size = get_size(path)
+
+            start = time.perf_counter()
+            switched = core.repo_switch_commit(path, pinned)
+            elapsed_switch = time.perf_counter() - start
+
+            assert switched and git('rev-parse', 'HEAD', cwd=path) == pinned, f"{strategy}: failed to switch to the pinned commit"
+
+            print(f"{strategy:9} clone {elapsed_clone:6.2f}s {size:7.1f}MB   switch {elapsed_switch:5.2f}s -> {get_size(path):7.1f}MB")
+
+            shutil.rmtree(path, onerror=lambda func, p, _: (os.chmod(p, 0o700), func(p)))  # read-only pack files on Windows
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1)
@@ -0,0 +1,108 @@
+"""
+Measure the startup cost of resolving the installed node packs with and without the persisted index
+(`installed-pack-index.json`) on a synthetic custom_nodes tree.
+Each measurement is a fresh process, like a ComfyUI restart.
+
+usage: python scripts/bench-installed-index.py [number of packs (default: 500)]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+
+
+def make_tree(base, n):
+    """
+    80% git packs and 20% CNR packs, 10% of them disabled
+    """
+    custom_nodes = os.path.join(base, 'custom_nodes')
+
+    for i in range(n):
+        path = os.path.join(custom_nodes, '.disabled' if i % 10 == 0 else '', f'pack{i}')
+
+        if i % 5 == 0:
+            os.makedirs(path)
+            with open(os.path.join(path, '.tracking'), 'w') as f:
+                f.write('__init__.py\n')
+            with open(os.path.join(path, 'pyproject.toml'), 'w') as f:
+                f.write(f'[project]\nname = "pack{i}"\nversion = "1.0.{i}"\n')
+        else:
+            os.makedirs(os.path.join(path, '.git', 'refs', 'heads'))
+            with open(os.path.join(path, '.git', 'HEAD'), 'w') as f:
+                f.write('ref: refs/heads/main\n')
+            with open(os.path.join(path, '.git', 'refs', 'heads', 'main'), 'w') as f:
+                f.write(f'{i:040x}\n')
+            with open(os.path.join(path, '.git', 'config'), 'w') as f:
+                f.write(f'[remote "origin"]\n\turl = https://github.com/someone/pack{i}.git\n')
+
+        with open(os.path.join(path, '__init__.py'), 'w') as f:
+            f.write('NODE_CLASS_MAPPINGS = {}\n')
+
+
+def make_registry(n):
+    return [{'id': f'pack{i}', 'name': f'pack{i}', 'description': '', 'publisher': {'name': 'someone'},
+             'repository': f'https://github.com/someone/pack{i}', 'latest_version': {'version': f'1.0.{i}'}} for i in range(0, n, 5)]
+
+
+def run(base, n, use_index):
+    import cm_global
+    cm_global.pip_overrides = {}
+    cm_global.pip_blacklist = set()
+    cm_global.pip_downgrade_blacklist = []
+
+    import manager_core as core
+    import manager_util
+    import cnr_utils
+
+    custom_nodes = os.path.join(base, 'custom_nodes')
+    core.update_user_directory(os.path.join(base, 'user'))
+    core.default_custom_nodes_path = custom_nodes
+    core.get_custom_nodes_paths = lambda: [custom_nodes]
+    core.get_config()['network_mode'] = 'offline'
+
+    # the registry catalog as synced by a previous run
+    uri = f'{cnr_utils.base_url}/nodes'
+    if not os.path.exists(manager_util.get_cache_path(uri)):
+        manager_util.save_to_cache(uri, {'nodes': make_registry(n)})
+
+    if not use_index and os.path.exists(core.get_installed_pack_index_path()):
+        os.remove(core.get_installed_pack_index_path())
+
+    # the same order as the server startup
+    start = time.perf_counter()
+    core.get_installed_node_packs()
+    elapsed_packs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(core.unified_manager.reload('cache'))
+    elapsed_reload = time.perf_counter() - start
+
+    print(elapsed_packs * 1000, elapsed_reload * 1000)
+
+
+def main(n, repeat=3):
+    with tempfile.TemporaryDirectory() as base:
+        make_tree(base, n)
+        print(f"{n} packs, {repeat} runs each\n")
+
+        for use_index in [False, True]:
+            results = []
+            for _ in range(repeat):
+                out = subprocess.check_output([sys.executable, __file__, '--run', base, str(n), str(use_index)], text=True)
+                results.append([float(x) for x in out.split()[-2:]])
+
+            packs = [x[0] for x in results]
+            reload = [x[1] for x in results]
+            print(f"{'with index' if use_index else 'without index':14}"
+                  f"get_installed_node_packs {min(packs):6.1f}-{max(packs):6.1f}ms   reload {min(reload):6.1f}-{max(reload):6.1f}ms")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run(sys.argv[2], int(sys.argv[3]), sys.argv[4] == 'True')
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
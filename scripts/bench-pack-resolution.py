@@ -0,0 +1,134 @@
+"""
+Measure the reload latency of the node pack resolution against the pack count,
+resolving sequentially (1 worker) and in parallel (`pack_resolution_workers`), on synthetic custom_nodes trees.
+Each measurement is a fresh process without the persisted index.
+
+A latency can be injected into every open()/stat() under custom_nodes to emulate a network filesystem.
+
+usage: python scripts/bench-pack-resolution.py [latency in ms (default: 0)] [pack counts (default: 100,500,2000)]
+"""
+import asyncio
+import builtins
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+
+
+def make_tree(base, n):
+    """
+    80% git packs and 20% CNR packs, 10% of them disabled
+    """
+    custom_nodes = os.path.join(base, 'custom_nodes')
+
+    for i in range(n):
+        path = os.path.join(custom_nodes, '.disabled' if i % 10 == 0 else '', f'pack{i}')
+
+        if i % 5 == 0:
+            os.makedirs(path)
+            with open(os.path.join(path, '.tracking'), 'w') as f:
+                f.write('__init__.py\n')
+            with open(os.path.join(path, 'pyproject.toml'), 'w') as f:
+                f.write(f'[project]\nname = "pack{i}"\nversion = "1.0.{i}"\n')
+        else:
+            os.makedirs(os.path.join(path, '.git', 'refs', 'heads'))
+            with open(os.path.join(path, '.git', 'HEAD'), 'w') as f:
+                f.write('ref: refs/heads/main\n')
+            with open(os.path.join(path, '.git', 'refs', 'heads', 'main'), 'w') as f:
+                f.write(f'{i:040x}\n')
+            with open(os.path.join(path, '.git', 'config'), 'w') as f:
+                f.write(f'[remote "origin"]\n\turl = https://github.com/someone/pack{i}.git\n')
+
+        with open(os.path.join(path, '__init__.py'), 'w') as f:
+            f.write('NODE_CLASS_MAPPINGS = {}\n')
+
+
+def make_registry(n):
+    return [{'id': f'pack{i}', 'name': f'pack{i}', 'description': '', 'publisher': {'name': 'someone'},
+             'repository': f'https://github.com/someone/pack{i}', 'latest_version': {'version': f'1.0.{i}'}} for i in range(0, n, 5)]
+
+
+def inject_latency(root, latency):
+    orig_open = builtins.open
+    orig_stat = os.stat
+
+    def slow_open(file, *args, **kwargs):
+        if str(file).startswith(root):
+            time.sleep(latency)
+        return orig_open(file, *args, **kwargs)
+
+    def slow_stat(path, *args, **kwargs):
+        if str(path).startswith(root):
+            time.sleep(latency)
+        return orig_stat(path, *args, **kwargs)
+
+    builtins.open = slow_open
+    os.stat = slow_stat
+
+
+def run(base, n, workers, latency):
+    import cm_global
+    cm_global.pip_overrides = {}
+    cm_global.pip_blacklist = set()
+    cm_global.pip_downgrade_blacklist = []
+
+    import manager_core as core
+    import manager_util
+    import cnr_utils
+
+    custom_nodes = os.path.join(base, 'custom_nodes')
+    core.update_user_directory(os.path.join(base, 'user'))
+    core.default_custom_nodes_path = custom_nodes
+    core.get_custom_nodes_paths = lambda: [custom_nodes]
+    core.get_config()['network_mode'] = 'offline'
+    if workers:
+        core.pack_resolution_workers = workers
+
+    uri = f'{cnr_utils.base_url}/nodes'
+    if not os.path.exists(manager_util.get_cache_path(uri)):
+        manager_util.save_to_cache(uri, {'nodes': make_registry(n)})
+
+    if os.path.exists(core.get_installed_pack_index_path()):
+        os.remove(core.get_installed_pack_index_path())
+
+    if latency:
+        inject_latency(custom_nodes, latency)
+
+    def measure(f):
+        start = time.perf_counter()
+        f()
+        return (time.perf_counter() - start) * 1000
+
+    cold = measure(lambda: asyncio.run(core.unified_manager.reload('cache')))
+    warm = measure(lambda: asyncio.run(core.unified_manager.reload('cache')))
+
+    core.get_installed_pack_index().clear()
+    packs = measure(core.get_installed_node_packs)
+    snapshot = measure(lambda: asyncio.run(core.get_current_snapshot(custom_nodes_only=True)))
+
+    print(core.pack_resolution_workers, cold, warm, packs, snapshot)
+
+
+def main(latency, counts):
+    print(f"injected latency: {latency * 1000:g}ms per open()/stat()\n")
+
+    for n in counts:
+        with tempfile.TemporaryDirectory() as base:
+            make_tree(base, n)
+
+            for workers in [1, 0]:  # sequential, default
+                out = subprocess.check_output([sys.executable, __file__, '--run', base, str(n), str(workers), str(latency)], text=True)
+                workers, cold, warm, packs, snapshot = [float(x) for x in out.split()[-5:]]
+                print(f"N={n:5} workers={workers:2.0f}  reload cold {cold:8.1f}ms  warm {warm:7.1f}ms  "
+                      f"get_installed_node_packs {packs:8.1f}ms  snapshot {snapshot:8.1f}ms")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5]))
+    else:
+        main(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0,
+             [int(x) for x in sys.argv[2].split(',')] if len(sys.argv) > 2 else [100, 500, 2000])
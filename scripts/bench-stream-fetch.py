@@ -0,0 +1,101 @@
+"""
+Measure the peak memory of one DB refresh (`fetch_to_cache`) from a local HTTP server,
+with the streamed download/parse and with the previous whole-body path.
+Each run is a separate process, so the peak RSS of one run doesn't hide the others. (POSIX only)
+
+usage: python scripts/bench-stream-fetch.py [DB file (default: custom-node-list.json)]
+"""
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+import manager_util  # noqa: E402
+
+
+def get_peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # macOS reports bytes, Linux KB
+
+
+def start_server(body):
+    async def handler(request):
+        return web.Response(body=body, content_type='application/json')
+
+    started = threading.Event()
+    port = []
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        app = web.Application()
+        app.router.add_get('/db.json', handler)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', 0).start())
+        port.append(runner.addresses[0][1])
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+
+    return f'http://127.0.0.1:{port[0]}/db.json'
+
+
+def run(path, mode, codec):
+    with open(path, 'rb') as f:
+        body = f.read()
+
+    uri = start_server(body)
+
+    manager_util.cache_codec = codec
+    if mode == 'previous':
+        manager_util.cache_stream_codecs.pop(codec, None)
+    elif mode == 'streamed-no-ijson':
+        manager_util.ijson = None
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manager_util.cache_dir = cache_dir
+
+        gc.collect()
+        base = get_peak_rss()
+        obj = asyncio.run(manager_util.fetch_to_cache(uri, silent=True))
+        peak = get_peak_rss()
+
+        assert obj == json.loads(body)
+
+    print((peak - base) / 1024 / 1024)
+
+
+def main(path):
+    modes = ['previous', 'streamed'] + (['streamed-no-ijson'] if manager_util.ijson is not None else [])
+    codecs = [x for x in ['json', 'gzip', 'zstd'] if x in manager_util.cache_codecs]
+
+    print(f"{os.path.basename(path)}: {os.path.getsize(path) / 1024 / 1024:.1f}MB, ijson {'installed' if manager_util.ijson is not None else 'not installed'}")
+    print("peak RSS increase of one refresh\n")
+    print(f"{'codec':8}" + ''.join(f"{x:>20}" for x in modes))
+
+    for codec in codecs:
+        row = f"{codec:8}"
+        for mode in modes:
+            out = subprocess.check_output([sys.executable, __file__, '--run', path, mode, codec], text=True)
+            row += f"{float(out.split()[-1]):>18.1f}MB"
+
+        print(row)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run(*sys.argv[2:5])
+    else:
+        main(os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else os.path.join(manager_util.comfyui_manager_path, 'custom-node-list.json'))
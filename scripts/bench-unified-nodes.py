@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of `get_unified_total_nodes` with a large synthetic registry catalog and installed CNR packs,
+with the memoized version parsers (`version_cache_size`) warm and cleared before every call.
+
+usage: python scripts/bench-unified-nodes.py [registry entries (default: 5000)] [installed packs (default: 500)]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+
+import cm_global  # noqa: E402
+cm_global.pip_overrides = {}
+cm_global.pip_blacklist = set()
+cm_global.pip_downgrade_blacklist = []
+cm_global.register_api('cm.is_import_failed_extension', lambda name: False)  # registered by prestartup_script.py in ComfyUI
+
+import manager_core as core  # noqa: E402
+import manager_util  # noqa: E402
+import cnr_utils  # noqa: E402
+
+
+REPEAT = 10
+
+
+def make_tree(custom_nodes, n):
+    for i in range(n):
+        path = os.path.join(custom_nodes, f'pack{i}')
+        os.makedirs(path)
+
+        with open(os.path.join(path, '.tracking'), 'w') as f:
+            f.write('__init__.py\n')
+        with open(os.path.join(path, 'pyproject.toml'), 'w') as f:
+            f.write(f'[project]\nname = "pack{i}"\nversion = "1.{i % 700}.0"\n')
+        with open(os.path.join(path, '__init__.py'), 'w') as f:
+            f.write('NODE_CLASS_MAPPINGS = {}\n')
+
+
+def make_registry(n):
+    return [{'id': f'pack{i}', 'name': f'pack{i}', 'description': '', 'publisher': {'name': 'someone'},
+             'repository': f'https://github.com/someone/pack{i}', 'latest_version': {'version': f'1.{i % 700}.{i % 13}'}} for i in range(n)]
+
+
+def clear_version_caches():
+    manager_util.parse_strict_version.cache_clear()
+    manager_util.get_strict_version.cache_clear()
+    manager_util.get_pep440_version.cache_clear()
+
+
+async def measure(before_each=None):
+    results = []
+    for _ in range(REPEAT):
+        if before_each is not None:
+            before_each()
+
+        with contextlib.redirect_stdout(io.StringIO()):  # registry cache notices
+            start = time.perf_counter()
+            await core.get_unified_total_nodes('default', 'cache')
+        results.append((time.perf_counter() - start) * 1000)
+
+    return results
+
+
+async def main(n_registry, n_installed):
+    with tempfile.TemporaryDirectory() as base:
+        custom_nodes = os.path.join(base, 'custom_nodes')
+        make_tree(custom_nodes, n_installed)
+
+        core.update_user_directory(os.path.join(base, 'user'))
+        core.default_custom_nodes_path = custom_nodes
+        core.get_custom_nodes_paths = lambda: [custom_nodes]
+        core.get_config()['network_mode'] = 'offline'
+
+        manager_util.save_to_cache(f'{cnr_utils.base_url}/nodes', {'nodes': make_registry(n_registry)})
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            nodes = await core.get_unified_total_nodes('default', 'cache')  # warm up: load the DB and resolve the packs
+        updatable = sum(1 for v in nodes.values() if v.get('update-state') == 'true' or v.get('updatable') is True)
+        print(f"{n_registry} registry entries, {n_installed} installed packs ({updatable} updatable), {len(nodes)} node packs in the list\n")
+
+        for label, before_each in [('memoized', None), ('memo cleared', clear_version_caches)]:
+            results = await measure(before_each)
+            print(f"{label:14} best {min(results):6.1f}ms  median {statistics.median(results):6.1f}ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 500))
@@ -0,0 +1,118 @@
+"""
+Benchmark the update check of git node packs against local bare repositories standing in for GitHub
+(half of them have an update): the previous ThreadPool(4) + GitPython check and the async check with
+`update_check_method` = fetch and ls-remote.
+
+usage: python scripts/bench-update-check.py [number of packs (default: 100)]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+
+import cm_global  # noqa: E402
+cm_global.pip_overrides = {}
+cm_global.pip_blacklist = set()
+cm_global.pip_downgrade_blacklist = []
+
+import manager_core as core  # noqa: E402
+
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='bench', GIT_AUTHOR_EMAIL='bench@localhost',
+               GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='bench@localhost')
+
+
+def git(*args, cwd=None, date=None):
+    env = dict(GIT_ENV, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date) if date else GIT_ENV
+    subprocess.run(['git', *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+def make_fixture(base, n):
+    """
+    :return: paths of the cloned node packs
+    """
+    work = os.path.join(base, 'work')
+    git('init', '-q', '-b', 'main', work)
+    for i in range(3):
+        with open(os.path.join(work, 'nodes.py'), 'w') as f:
+            f.write(str(i) * 1000)
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', f'commit {i}', cwd=work, date=f'2024-01-0{i + 1}T00:00:00')
+
+    paths = []
+    for i in range(n):
+        bare = os.path.join(base, 'remotes', f'pack{i}.git')
+        git('init', '-q', '--bare', '-b', 'main', bare)
+        git('push', '-q', bare, 'main', cwd=work)
+
+        path = os.path.join(base, 'custom_nodes', f'pack{i}')
+        git('clone', '-q', bare, path)
+        paths.append(path)
+
+    # an update for every other pack
+    with open(os.path.join(work, 'nodes.py'), 'w') as f:
+        f.write('update')
+    git('commit', '-q', '-am', 'update', cwd=work, date='2024-02-01T00:00:00')
+
+    for i in range(0, n, 2):
+        git('push', '-q', os.path.join(base, 'remotes', f'pack{i}.git'), 'main', cwd=work)
+
+    return paths
+
+
+def forget_fetched_refs(paths):
+    for path in paths:
+        git('update-ref', 'refs/remotes/origin/main', 'HEAD', cwd=path)
+
+
+def check_previous(paths):
+    results = {}
+
+    def check(path):
+        results[path] = core.git_repo_update_check_with(path, do_fetch=True)
+
+    with ThreadPoolExecutor(4) as executor, contextlib.redirect_stdout(io.StringIO()):  # "Fetching: ..." lines
+        list(executor.map(check, paths))
+
+    return results
+
+
+def check_async(paths, method):
+    core.get_config()['update_check_method'] = method
+    return asyncio.run(core.check_git_repos_update(paths, do_fetch=True, force=True))
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as base:
+        core.update_user_directory(os.path.join(base, 'user'))  # keeps the update check cache out of the real user dir
+
+        start = time.perf_counter()
+        paths = make_fixture(base, n)
+        print(f"{n} packs ({len(range(0, n, 2))} with an update), fixture built in {time.perf_counter() - start:.1f}s")
+        print(f"update_check_workers: {core.get_config()['update_check_workers']}\n")
+
+        expected = None
+        for label, f in [('ThreadPool(4) + GitPython', check_previous),
+                         ('async, fetch', lambda x: check_async(x, 'fetch')),
+                         ('async, ls-remote', lambda x: check_async(x, 'ls-remote'))]:
+            forget_fetched_refs(paths)
+
+            start = time.perf_counter()
+            results = f(paths)
+            elapsed = time.perf_counter() - start
+
+            expected = expected or results
+            assert results == expected, f"{label}: different results"
+
+            print(f"{label:26} {elapsed:6.2f}s  updatable={sum(1 for x in results.values() if x[0])}  failed={sum(1 for x in results.values() if not x[1])}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,97 @@
+"""
+Check the conditional (ETag) sync of the ComfyRegistry catalog against a local stand-in registry server.
+
+usage: python scripts/check-cnr-sync.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+import manager_util  # noqa: E402
+import cnr_utils  # noqa: E402
+
+
+TOTAL_PAGES = 4
+
+
+class StandInRegistry:
+    """
+    Serves `/nodes?page=N` with a per-page ETag, like api.comfy.org does.
+    """
+    def __init__(self):
+        self.versions = {page: 1 for page in range(1, TOTAL_PAGES + 1)}
+        self.failing_pages = set()
+        self.log = []  # (page, status)
+
+    async def nodes(self, request):
+        page = int(request.query['page'])
+
+        if page in self.failing_pages:
+            self.log.append((page, 500))
+            return web.Response(status=500)
+
+        etag = f'"p{page}v{self.versions[page]}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.log.append((page, 304))
+            return web.Response(status=304, headers={'ETag': etag})
+
+        self.log.append((page, 200))
+        nodes = [{'id': f'node{page}_{i}', 'rev': self.versions[page]} for i in range(cnr_utils.page_size)]
+        return web.json_response({'totalPages': TOTAL_PAGES, 'nodes': nodes}, headers={'ETag': etag})
+
+    def take_log(self):
+        log, self.log = sorted(self.log), []
+        return log
+
+
+async def check_conditional_sync():
+    registry = StandInRegistry()
+    app = web.Application()
+    app.router.add_get('/nodes', registry.nodes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+
+    prev_base_url, prev_cache_dir = cnr_utils.base_url, manager_util.cache_dir
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            manager_util.cache_dir = cache_dir
+            cnr_utils.base_url = 'http://127.0.0.1:%d' % runner.addresses[0][1]
+
+            # 1. first sync: every page is downloaded
+            nodes = await cnr_utils.get_cnr_data(cache_mode=False)
+            assert len(nodes) == TOTAL_PAGES * cnr_utils.page_size
+            assert registry.take_log() == [(1, 200), (2, 200), (3, 200), (4, 200)]
+
+            # 2. one page changed: only that page is downloaded, the others are revalidated
+            registry.versions[3] = 2
+            nodes = await cnr_utils.get_cnr_data(cache_mode=False)
+            assert registry.take_log() == [(1, 304), (2, 304), (3, 200), (4, 304)]
+            assert len(nodes) == TOTAL_PAGES * cnr_utils.page_size
+            assert all(x['rev'] == 2 for x in nodes if x['id'].startswith('node3_'))
+
+            # 3. a page fails: the sync fails, but the finished pages are checkpointed
+            registry.versions[2] = 2
+            registry.failing_pages.add(4)
+            assert await cnr_utils.get_cnr_data(cache_mode=False) == {}
+            assert registry.take_log() == [(1, 304), (2, 200), (3, 304), (4, 500)]
+
+            # 4. the next sync resumes from the failed page
+            registry.failing_pages.clear()
+            nodes = await cnr_utils.get_cnr_data(cache_mode=False)
+            assert registry.take_log() == [(4, 304)]
+            assert len(nodes) == TOTAL_PAGES * cnr_utils.page_size
+            assert all(x['rev'] == 2 for x in nodes if x['id'].startswith(('node2_', 'node3_')))
+    finally:
+        cnr_utils.base_url, manager_util.cache_dir = prev_base_url, prev_cache_dir
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(check_conditional_sync())
+    print("OK")
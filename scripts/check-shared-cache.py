@@ -0,0 +1,126 @@
+"""
+Stress `atomic_write` and `cache_refresh_lock` with several processes sharing one cache directory,
+the way ComfyUI instances do with `shared_cache_dir`.
+
+usage: python scripts/check-shared-cache.py
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'glob'))
+import manager_util  # noqa: E402
+
+
+WRITERS = 4
+READERS = 8
+WRITES = 200
+REFRESHERS = 8
+
+
+def make_document(writer, n):
+    return {'writer': writer, 'n': n, 'items': ['x' * 100] * (500 + n)}
+
+
+def writer(path, idx):
+    for n in range(WRITES):
+        manager_util.write_cache_file(path, make_document(idx, n))
+
+
+def reader(path, deadline, result):
+    ok = torn = 0
+    while time.time() < deadline:
+        try:
+            obj = manager_util.read_cache_file(path)
+        except FileNotFoundError:
+            continue
+        except Exception:
+            torn += 1
+            continue
+
+        if obj == make_document(obj['writer'], obj['n']):
+            ok += 1
+        else:
+            torn += 1
+
+    result.put((ok, torn))
+
+
+def refresher(path, barrier, result):
+    async def refresh():
+        barrier.wait()
+        async with manager_util.cache_refresh_lock(path) as refreshed:
+            # only one process at a time may be here
+            try:
+                marker = os.open(path + '.inside', os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                return 'overlap'
+
+            try:
+                if refreshed:
+                    return 'reused'
+
+                await asyncio.sleep(0.5)
+                manager_util.atomic_write(path, '{"refreshed_by": %d}' % os.getpid())
+                return 'refreshed'
+            finally:
+                os.close(marker)
+                os.remove(path + '.inside')
+
+    result.put(asyncio.run(refresh()))
+
+
+def check_atomic_write(cache_dir):
+    path = os.path.join(cache_dir, 'atomic.json')
+    result = multiprocessing.Queue()
+    deadline = time.time() + 3
+
+    procs = [multiprocessing.Process(target=reader, args=(path, deadline, result)) for _ in range(READERS)]
+    procs += [multiprocessing.Process(target=writer, args=(path, i)) for i in range(WRITERS)]
+    for p in procs:
+        p.start()
+
+    reads = [result.get() for _ in range(READERS)]
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0, f"process failed: {p.exitcode}"
+
+    ok = sum(x[0] for x in reads)
+    torn = sum(x[1] for x in reads)
+    print(f"atomic_write: {ok} reads, {torn} torn")
+
+    assert ok > 0
+    assert torn == 0
+    assert [x for x in os.listdir(cache_dir) if x.endswith('.tmp')] == [], "temp files are left behind"
+    assert manager_util.read_cache_file(path)['n'] == WRITES - 1
+
+
+def check_cache_refresh_lock(cache_dir):
+    path = os.path.join(cache_dir, 'refresh.json')
+    barrier = multiprocessing.Barrier(REFRESHERS)
+    result = multiprocessing.Queue()
+
+    procs = [multiprocessing.Process(target=refresher, args=(path, barrier, result)) for _ in range(REFRESHERS)]
+    for p in procs:
+        p.start()
+
+    outcomes = sorted(result.get() for _ in range(REFRESHERS))
+    for p in procs:
+        p.join()
+
+    print(f"cache_refresh_lock: {outcomes.count('refreshed')} refreshed, {outcomes.count('reused')} reused, {outcomes.count('overlap')} overlapped")
+
+    assert outcomes.count('overlap') == 0
+    assert outcomes.count('refreshed') == 1
+    assert outcomes.count('reused') == REFRESHERS - 1
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as cache_dir:
+        check_atomic_write(cache_dir)
+        check_cache_refresh_lock(cache_dir)
+
+    print("OK")